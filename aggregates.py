@@ -0,0 +1,194 @@
+"""
+    Per-league partial aggregates of the dashboard data, built once at startup.
+
+    Every league keeps sums, counts, extremes and sorted value arrays of its clubs and players. A selection of
+    several leagues is answered by combining the partials of the selected leagues instead of filtering and
+    regrouping the players and clubs frames on every callback.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from pitch import Pitch
+
+class ValueSummary:
+    """
+        Partial aggregate of one value column: count, sum, sorted values and the rows holding the extremes.
+        Missing values are left out like pandas does. Extremes remember their row position, so combined
+        partials resolve ties to the first row just like idxmax and idxmin.
+    """
+    def __init__(self, values, positions, names):
+        # The extremes keep the dtype of the column, sums and sorted values are floats
+        values = np.asarray(values)
+        present = ~pd.isna(values)
+        values, positions, names = values[present], np.asarray(positions)[present], np.asarray(names, dtype=object)[present]
+        floats = values.astype(float)
+
+        self.count = len(values)
+        self.total = floats.sum()
+        self.sorted_values = np.sort(floats)
+        self.highest = self.lowest = None
+        if self.count > 0:
+            highest, lowest = floats.argmax(), floats.argmin()
+            self.highest = (values[highest], positions[highest], names[highest])
+            self.lowest = (values[lowest], positions[lowest], names[lowest])
+
+    @classmethod
+    def combine(cls, partials):
+        combined = cls.__new__(cls)
+        partials = [partial for partial in partials if partial.count > 0]
+        combined.count = sum(partial.count for partial in partials)
+        combined.total = sum(partial.total for partial in partials)
+        combined.sorted_values = np.sort(np.concatenate([partial.sorted_values for partial in partials] or [np.empty(0)]), kind="mergesort")
+        combined.highest = max((partial.highest for partial in partials), key=lambda extreme: (extreme[0], -extreme[1]), default=None)
+        combined.lowest = min((partial.lowest for partial in partials), key=lambda extreme: (extreme[0], extreme[1]), default=None)
+        return combined
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+    @property
+    def median(self):
+        middle = self.count // 2
+        if self.count % 2 == 1:
+            return self.sorted_values[middle]
+        return (self.sorted_values[middle - 1] + self.sorted_values[middle]) / 2
+
+class Selection:
+    """
+        Combined aggregates of a selection of leagues. Each aggregate is combined on first use and then shared
+        by all callbacks working on the same selection.
+    """
+    def __init__(self, aggregates, league_ids):
+        self.aggregates = aggregates
+        self.league_ids = list(league_ids)
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self.lock:
+            if key in self.results:
+                return self.results[key]
+        result = compute()
+        with self.lock:
+            return self.results.setdefault(key, result)
+
+    def club_stats(self):
+        return self.get(("club_stats",), lambda: self.aggregates.club_stats(self.league_ids))
+
+    def player_stats(self):
+        return self.get(("player_stats",), lambda: self.aggregates.player_stats(self.league_ids))
+
+    def positions(self):
+        return self.get(("positions",), lambda: self.aggregates.select_positions(self.league_ids))
+
+    def market_value_by_club_and_position(self):
+        return self.get(("market_value_by_club_and_position",), lambda: self.aggregates.market_value_by_club_and_position(self.league_ids))
+
+    def market_value_by_sub_position(self, how):
+        return self.get(("market_value_by_sub_position", how), lambda: self.aggregates.market_value_by_sub_position(self.league_ids, how))
+
+    def market_value_density(self, how):
+        """
+            Returns the market value per sub_position aggregated by how, smoothed over the pitch (see Pitch.density_grid)
+        """
+        def compute():
+            pitch = Pitch(None)
+            pitch.position_data = self.market_value_by_sub_position(how)
+            pitch.position_data = pitch.convert_position_to_coordinates()
+            return pitch.density_grid()
+        return self.get(("market_value_density", how), compute)
+
+class LeagueAggregates:
+    """
+        Partial aggregates per league of players and clubs (see ValueSummary), the market value per club and
+        position for the bar chart, per sub_position sums, counts and maxima for the density pitch and the row
+        positions of each league's players
+    """
+    def __init__(self, players, clubs):
+        self.players = players
+        self.club_summaries = {}
+        self.player_summaries = {}
+        self.club_position_market_values = {}
+        self.sub_position_market_values = {}
+        self.player_positions = {}
+
+        club_positions = pd.Series(np.arange(len(clubs)), index=clubs.index)
+        for league_id, league_clubs in clubs.groupby("league_id", sort=False, observed=True):
+            self.club_summaries[league_id] = ValueSummary(
+                league_clubs["market_value"], club_positions[league_clubs.index], league_clubs["pretty_name"]
+            )
+
+        self.selections = OrderedDict()
+        self.selections_lock = threading.Lock()
+        self.max_selections = 32
+
+        player_positions = pd.Series(np.arange(len(players)), index=players.index)
+        for league_id, league_players in players.groupby("league_id", sort=False, observed=True):
+            positions = player_positions[league_players.index].to_numpy()
+            self.player_positions[league_id] = positions
+            self.player_summaries[league_id] = ValueSummary(league_players["market_value"], positions, league_players["pretty_name"])
+            self.club_position_market_values[league_id] = league_players.groupby(["club_name", "position"], observed=True)["market_value"].sum()
+            self.sub_position_market_values[league_id] = league_players.groupby("sub_position", observed=True)["market_value"].agg(["sum", "count", "max"])
+
+    def select(self, league_ids):
+        """
+            Returns the Selection of league_ids, shared between callbacks. The order of league_ids does not matter,
+            the most recently used selections are kept.
+        """
+        key = tuple(sorted(league_ids or []))
+        with self.selections_lock:
+            selection = self.selections.get(key)
+            if selection is None:
+                selection = self.selections[key] = Selection(self, key)
+            self.selections.move_to_end(key)
+            while len(self.selections) > self.max_selections:
+                self.selections.popitem(last=False)
+            return selection
+
+    def club_stats(self, league_ids):
+        return ValueSummary.combine(self.club_summaries[league_id] for league_id in league_ids if league_id in self.club_summaries)
+
+    def player_stats(self, league_ids):
+        return ValueSummary.combine(self.player_summaries[league_id] for league_id in league_ids if league_id in self.player_summaries)
+
+    def select_positions(self, league_ids):
+        """
+            Returns the row positions of the players of the selected leagues in ascending order
+        """
+        positions = [self.player_positions[league_id] for league_id in league_ids if league_id in self.player_positions]
+        return np.sort(np.concatenate(positions or [np.empty(0, dtype=int)]))
+
+    def select_players(self, league_ids):
+        """
+            Returns the players of the selected leagues in their original order
+        """
+        return self.players.take(self.select_positions(league_ids))
+
+    def market_value_by_club_and_position(self, league_ids):
+        """
+            Returns the summed market value per club_name and position, clubs belong to exactly one league
+        """
+        partials = [self.club_position_market_values[league_id] for league_id in league_ids if league_id in self.club_position_market_values]
+        if len(partials) == 0:
+            return pd.DataFrame(columns=["club_name", "position", "market_value"])
+        return pd.concat(partials).sort_index().reset_index()
+
+    def market_value_by_sub_position(self, league_ids, how):
+        """
+            Returns the market value per sub_position aggregated by how ("sum", "mean" or "max")
+        """
+        partials = [self.sub_position_market_values[league_id] for league_id in league_ids if league_id in self.sub_position_market_values]
+        if len(partials) == 0:
+            return pd.DataFrame(columns=["sub_position", "market_value"])
+        combined = pd.concat(partials).groupby(level=0, observed=True)
+        if how == "sum":
+            market_values = combined["sum"].sum()
+        elif how == "mean":
+            market_values = combined["sum"].sum() / combined["count"].sum()
+        else:
+            market_values = combined["max"].max()
+        return market_values.rename("market_value").rename_axis("sub_position").reset_index()
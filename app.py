@@ -3,6 +3,11 @@
 # Run this app with `python app.py` and
 # visit http://127.0.0.1:8050/ in your web browser.
 
+import base64
+import glob
+import os
+import threading
+
 import dash
 import dash_table
 import dash_core_components as dcc
@@ -10,10 +15,18 @@ import dash_bootstrap_components as dbc
 import dash_html_components as html
 import plotly.express as px
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
 from dash.dependencies import Input, Output
-from pitch import Pitch
-from PIL import Image
+from flask import jsonify
+from aggregates import LeagueAggregates
+from club_index import ClubIndex
+from columnar import load_table
+from memo import CallbackCache
+from partitions import combine_player_seasons, load_partitions
+from schema import apply_schema
+from snapshot import SnapshotManager
+from table import TableIndex
 
 app = dash.Dash(
     __name__,
@@ -26,53 +39,68 @@ app = dash.Dash(
 
 server = app.server
 
-clubs = pd.read_csv("data/clubs_extended.csv")
-players = pd.read_csv("data/players_extended.csv")
-games = pd.read_csv("data/games_extended.csv")
+# A subset of a partitioned pipeline run (python preprocessing.py --partitioned) can be selected with
+# DATA_LEAGUES and DATA_SEASONS, e.g. DATA_LEAGUES=GB1,L1 DATA_SEASONS=2020 python app.py
+data_leagues = os.environ.get("DATA_LEAGUES")
+data_seasons = os.environ.get("DATA_SEASONS")
 
-def who_won(home_club_goals, away_club_goals):
-    """
+# Seconds between checks of the data files for a new version, 0 turns reloading off
+data_reload_interval = float(os.environ.get("DATA_RELOAD_INTERVAL", "5"))
 
+def data_files():
+    if data_leagues or data_seasons:
+        return sorted(glob.glob("data/partitions/*/*/*_updated.csv")) + ["data/clubs_extended.csv", "data/leagues.csv"]
+    return ["data/clubs_extended.csv", "data/players_extended.csv", "data/games_extended.csv", "data/leagues.csv"]
+
+def load_data():
+    """
+        Returns clubs, players and games reduced to the columns of the schema and the leagues (or None)
     """
-    if home_club_goals > away_club_goals:
-        return "home"
-    elif away_club_goals > home_club_goals:
-        return "away"
+    # Prefer the columnar copies of the data files, they are memory-mapped instead of parsed
+    if data_leagues or data_seasons:
+        league_ids = data_leagues.split(",") if data_leagues else None
+        seasons = [int(season) for season in data_seasons.split(",")] if data_seasons else None
+        clubs = load_partitions("clubs", league_ids, seasons).drop_duplicates("club_id", ignore_index=True)
+        # Every partition holds its season's totals, a player is counted once with the totals of all seasons
+        players = combine_player_seasons(load_partitions("players", league_ids, seasons))
+        games = load_partitions("games", league_ids, seasons)
+        # Partitions have no club coordinates, these come from clubs_extended.csv (see maps.py)
+        coordinates = load_table("data/clubs_extended.csv").set_index("club_id")[["latitude", "longitude"]]
+        clubs = clubs.join(coordinates, on="club_id")
     else:
-        return "draw"
+        clubs = load_table("data/clubs_extended.csv")
+        players = load_table("data/players_extended.csv")
+        games = load_table("data/games_extended.csv")
+    leagues = pd.read_csv("data/leagues.csv") if os.path.exists("data/leagues.csv") else None
 
-def get_higher_market_value(home_team, away_team):
-    if home_team > away_team:
-        return "home"
-    elif away_team > home_team:
-        return "away"
-    else:
-        return "draw"
+    # Only the columns used by the dashboard, repeated strings as categoricals and counters as small integers
+    return apply_schema(clubs, "clubs"), apply_schema(players, "players"), apply_schema(games, "games"), leagues
 
-def calculate_advantage_results(games_):
-    advantage_results_league = {"win": 0, "draw": 0, "loss": 0}
+def classify_advantage_results(games_):
+    """
+        Classifies every game by whether the team with the higher weighted market value won:
+        "win" if it won (or the game was drawn between teams of equal value), "draw" if the game was drawn
+        and "loss" otherwise. Missing market values count as equal.
+    """
+    result = np.sign(games_["home_club_goals"].to_numpy() - games_["away_club_goals"].to_numpy())
+    market_value_advantage = np.nan_to_num(np.sign(
+        games_["weighted_market_value_home"].to_numpy(dtype=float) - games_["weighted_market_value_away"].to_numpy(dtype=float)
+    ))
+    return np.select([result == market_value_advantage, result == 0], ["win", "draw"], "loss")
 
-    for _, row in games_.iterrows():
-        home_club_goals = row["home_club_goals"]
-        away_club_goals = row["away_club_goals"]
-        result = who_won(home_club_goals, away_club_goals)
-        
-        weighted_market_value_home = row["weighted_market_value_home"]
-        weighted_market_value_away = row["weighted_market_value_away"]
-        market_value_advantage = get_higher_market_value(weighted_market_value_home, weighted_market_value_away)
-        
-        if result == market_value_advantage:
-            advantage_results_league["win"] += 1
-        else:
-            if result == "draw":
-                advantage_results_league["draw"] += 1
-            else:
-                advantage_results_league["loss"] += 1
-
-    advantage_results_df = pd.DataFrame.from_dict(advantage_results_league, orient='index', columns=["results"])
+def count_advantage_results(results):
+    """
+        Counts the win, draw and loss advantage results
+    """
+    return {result: int(np.count_nonzero(results == result)) for result in ["win", "draw", "loss"]}
+
+def calculate_advantage_results(advantage_results):
+    advantage_results_df = pd.DataFrame.from_dict(advantage_results, orient='index', columns=["results"])
     fig = px.pie(advantage_results_df, values="results", names=advantage_results_df.index)
     return fig
 
+no_advantage_results = {"win": 0, "draw": 0, "loss": 0}
+
 navbar = dbc.Row(
     [
         dbc.Col(html.Img(src="assets/tm-logo.png", height="50px"), width=2),
@@ -108,6 +136,59 @@ def density_map(clubs):
     )
 
 
+# The pitch background is encoded once and the density pitch figure without data built once,
+# callbacks only add the heatmap of their positions
+with open('./assets/pitch.jpg', 'rb') as f:
+    pitch_image_source = 'data:image/jpeg;base64,' + base64.b64encode(f.read()).decode()
+
+def build_density_pitch_template():
+    density_pitch = go.Figure()
+
+    # axis hide、yaxis reversed
+    density_pitch.update_layout(
+        autosize=False,
+        width=1047,
+        height=705,
+        xaxis=dict(visible=False,autorange=True),
+        yaxis=dict(visible=False,autorange='reversed')
+    )
+
+    # background image add
+    density_pitch.add_layout_image(
+        dict(source=pitch_image_source,
+            xref='x',
+            yref='y',
+            x=0,
+            y=0,
+            sizex=130,
+            sizey=90,
+            sizing='stretch',
+            opacity=1,
+            layer='below')
+    )
+    return density_pitch.to_plotly_json()
+
+density_pitch_template = build_density_pitch_template()
+
+def density_pitch_figure(x, y, grid):
+    """
+        Returns the density pitch figure for a grid of smoothed market values (see Pitch.density_grid).
+        The template layout is shared between all figures and must not be modified.
+    """
+    # Whole euros are precise enough and keep the payload small,
+    # the browser interpolates the coarse grid into a smooth density
+    heatmap = {
+        "type": "heatmap",
+        "x": x,
+        "y": y,
+        "z": np.rint(grid).astype("int64"),
+        "zsmooth": "best",
+        "showscale": True,
+        "hoverinfo": "none",
+        "opacity": 0.5
+    }
+    return {"data": [heatmap], "layout": density_pitch_template["layout"]}
+
 def density_pitch():
     return (dbc.Card(
             [
@@ -138,15 +219,17 @@ def base_club_stats():
 def base_player_stats():
     return (dbc.Row(id="base-player-stats", style={"marginBottom": "20px"}))
 
-def players_table():
+players_table_columns = ["pretty_name", "age", "club_name", "sub_position", "games", "minutes_played", "goals", "assists", "wins", "draws", "losses", "market_value"]
+
+def players_table(season_label):
     data_columns = ["Name", "Age", "Club", "Position", "Games", "Minutes played", "Goals", "Assists", "Wins", "Draws", "Losses", "Market Value"]
-    df_columns = ["pretty_name", "age", "club_name", "sub_position", "games", "minutes_played", "goals", "assists", "wins", "draws", "losses", "market_value"]
+    df_columns = players_table_columns
         
     return (dbc.Card
         ([
             dbc.CardBody(
                 [
-                    html.H4("Player Details - Season 2020/2021", className="card-title"),
+                    html.H4("Player Details - Season {}".format(season_label), className="card-title"),
                     dash_table.DataTable(
                         id="players-table",
                         columns=[{
@@ -154,7 +237,14 @@ def players_table():
                             'id': df_columns[idx]
                         } for (idx, col) in enumerate(data_columns)],
                         style_table={'overflowX': 'auto'},
-                        page_size=10)            
+                        page_current=0,
+                        page_size=10,
+                        page_action='custom',
+                        sort_action='custom',
+                        sort_mode='single',
+                        sort_by=[],
+                        filter_action='custom',
+                        filter_query='')            
                 ]
             )
         ])
@@ -228,101 +318,152 @@ def pie_chart():
         )
     )
 
-app.layout = dbc.Container([
-    navbar,
-    dbc.Row(
-        [
-            dbc.Col(dcc.Dropdown(
-                id='league-dropdown',
-                multi=True,
-                options=[
-                    {'label': 'Premier League', 'value': 'GB1'},
-                    {'label': 'Bundesliga', 'value': 'L1'},
-                    {'label': 'La Liga', 'value': 'ES1'},
-                    {'label': 'Serie A', 'value': 'IT1'},
-                    {'label': 'Ligue 1', 'value': 'FR1'}
-                ],
-                value=['GB1']
-            ))
-        ],
-        style={"marginBottom": "20px"}
-    ),
-    base_club_stats(),
-    base_player_stats(),
-    dbc.Row(
-        [
-            dbc.Col(bar_chart())
-        ],
-        style={"marginBottom": "20px"}
-    ),
-    dbc.Row(
-        [
-            dbc.Col(density_pitch())
-        ],
-        style={"marginBottom": "20px"}
-    ),
-    dbc.Row(
-        [
-            dbc.Col(players_table())
-        ],
-        style={"marginBottom": "20px"}
-    ),
-    dbc.Row(
-        [
-            dbc.Col(
-                dcc.Dropdown(
-                    id='pie-chart-league-dropdown',
-                    options=[
-                        {'label': 'Premier League', 'value': 'GB1'},
-                        {'label': 'Bundesliga', 'value': 'L1'},
-                        {'label': 'La Liga', 'value': 'ES1'},
-                        {'label': 'Serie A', 'value': 'IT1'},
-                        {'label': 'Ligue 1', 'value': 'FR1'}
-                    ],
-                    value='GB1'
-                )
-            ),
-            dbc.Col(
-                dcc.Dropdown(
-                    id='pie-chart-team-dropdown',
-                    value='Manchester United'
+def build_layout(snapshot):
+    return dbc.Container([
+        navbar,
+        dbc.Row(
+            [
+                dbc.Col(dcc.Dropdown(
+                    id='league-dropdown',
+                    multi=True,
+                    options=snapshot.club_index.league_options(),
+                    value=['GB1']
+                ))
+            ],
+            style={"marginBottom": "20px"}
+        ),
+        base_club_stats(),
+        base_player_stats(),
+        dbc.Row(
+            [
+                dbc.Col(bar_chart())
+            ],
+            style={"marginBottom": "20px"}
+        ),
+        dbc.Row(
+            [
+                dbc.Col(density_pitch())
+            ],
+            style={"marginBottom": "20px"}
+        ),
+        dbc.Row(
+            [
+                dbc.Col(players_table(snapshot.club_index.season_label))
+            ],
+            style={"marginBottom": "20px"}
+        ),
+        dbc.Row(
+            [
+                dbc.Col(
+                    dcc.Dropdown(
+                        id='pie-chart-league-dropdown',
+                        options=snapshot.club_index.league_options(),
+                        value='GB1'
+                    )
+                ),
+                dbc.Col(
+                    dcc.Dropdown(
+                        id='pie-chart-team-dropdown',
+                        value='Manchester United'
+                    )
                 )
-            )
-        ],
-        style={"marginBottom": "20px"}
-    ),
-    pie_chart(),
-    dbc.Row(
-        [
-            dbc.Col(density_map(clubs))
-        ],
-        style={"marginBottom": "20px"}
-    )
-])
+            ],
+            style={"marginBottom": "20px"}
+        ),
+        pie_chart(),
+        dbc.Row(
+            [
+                dbc.Col(density_map(snapshot.clubs))
+            ],
+            style={"marginBottom": "20px"}
+        )
+    ])
+
+class DataSnapshot:
+    """
+        One version of the dashboard data and everything derived from it: the club and game index, the
+        per-league aggregates, the advantage results, the players table index and the page layout.
+        A reloaded version is warmed with the league selections recently used with the previous version,
+        so the first callbacks after the swap do not have to combine them.
+    """
+    def __init__(self, version, previous=None):
+        self.version = version
+        self.clubs, self.players, self.games, leagues = load_data()
+
+        # Clubs of each league and games of each league and club, leagues and seasons follow from the data
+        self.club_index = ClubIndex(self.clubs, self.games, leagues)
+
+        # Per-league partial aggregates, multi-league selections combine them instead of rescanning players and clubs
+        self.aggregates = LeagueAggregates(self.players, self.clubs)
+
+        # Advantage results of all games counted per league and per team (home and away games)
+        game_advantage_results = classify_advantage_results(self.games)
+        self.advantage_results_by_league = {
+            league_id: count_advantage_results(game_advantage_results[positions]) for league_id, positions in self.club_index.league_games.items()
+        }
+        self.advantage_results_by_team = {
+            club_name: count_advantage_results(game_advantage_results[positions]) for club_name, positions in self.club_index.club_games.items()
+        }
+
+        # The players table is paged, sorted and filtered on the server, only the visible page is sent to the browser
+        self.players_table_index = TableIndex(self.players, players_table_columns, default_sort=[{"column_id": "market_value", "direction": "desc"}])
+
+        self.layout_lock = threading.Lock()
+        self.page_layout = None
+        if previous is not None:
+            self.warm(previous)
+
+    def warm(self, previous):
+        for league_ids in list(previous.aggregates.selections):
+            selection = self.aggregates.select(league_ids)
+            selection.club_stats()
+            selection.player_stats()
+            selection.positions()
+            selection.market_value_by_club_and_position()
+            for how in ("sum", "mean", "max"):
+                selection.market_value_density(how)
+        self.layout()
+
+    def layout(self):
+        with self.layout_lock:
+            if self.page_layout is None:
+                self.page_layout = build_layout(self)
+            return self.page_layout
+
+# The data is reloaded in the background when a data file changes, each callback works on the snapshot it got
+snapshots = SnapshotManager(DataSnapshot, data_files, interval=data_reload_interval or None)
+
+@server.route("/_data-snapshot")
+def data_snapshot_stats():
+    return jsonify(snapshots.stats())
+
+# Serialized callback outputs of the most recent selections of the current data version
+callback_cache = CallbackCache(maxsize=256, ttl=3600, version=lambda: snapshots.get().version)
+
+@server.route("/_callback-cache")
+def callback_cache_stats():
+    return jsonify(callback_cache.stats())
+
+def serve_layout():
+    return snapshots.get().layout()
+
+# Callbacks are validated against the layout of the loaded snapshot. Otherwise Dash calls serve_layout on
+# import, which would start the snapshot watcher in the gunicorn master before the workers are forked.
+app.validation_layout = snapshots.current.layout()
+app.layout = serve_layout
 
 @app.callback(
+    Output('bar-chart', 'figure'),
     [
-        Output('bar-chart', 'figure'),
-        Output('players-table', 'data'),
-        Output('base-club-stats', 'children'),
-        Output('base-player-stats', 'children'),
-        Output('density-pitch', 'figure')
-    ], 
-    [
-        Input('league-dropdown', 'value'),
-        Input('density-pitch-dropdown', 'value')
+        Input('league-dropdown', 'value')
     ])
-def update_dashboard(league_ids, filter):
+@callback_cache.memoize(lambda league_ids: tuple(sorted(league_ids or [])))
+def update_bar_chart(league_ids):
     if len(league_ids) > 0:
         print(f"Values chosen: {league_ids}")
+        selection = snapshots.get().aggregates.select(league_ids)
 
-        players_ = players[players["league_id"].isin(league_ids)]
-        clubs_ = clubs[clubs["league_id"].isin(league_ids)]
-
-        #################
-        ### bar-chart ###
-        #################
-        grouped_df = players_.groupby(["club_name", "position"])["market_value"].sum().reset_index()
+        grouped_df = selection.market_value_by_club_and_position()
         fig = px.bar(grouped_df, x="club_name", y="market_value", color="position", labels={
                      "club_name": "Club",
                      "market_value": "Market Value (€)",
@@ -330,19 +471,23 @@ def update_dashboard(league_ids, filter):
                  })
         fig.update_layout(uniformtext_minsize=8, uniformtext_mode='hide')
 
-        #####################
-        ### players-table ###
-        #####################
-        players_ = players_[["pretty_name", "age", "club_name", "sub_position", "games", "minutes_played", "goals", "assists", "wins", "draws", "losses", "market_value"]].sort_values("market_value", ascending=False)
-        players_table = players_.to_dict('records')
+        return fig
 
-        #######################
-        ### base-club-stats ###
-        #######################
-        highest_club_value = dict(clubs_.loc[clubs_['market_value'].idxmax()])
-        lowest_club_value = dict(clubs_.loc[clubs_['market_value'].idxmin()])
-        mean_club_value = int(clubs_['market_value'].mean())
-        median_club_value = int(clubs_['market_value'].median())
+@app.callback(
+    Output('base-club-stats', 'children'),
+    [
+        Input('league-dropdown', 'value')
+    ])
+@callback_cache.memoize(lambda league_ids: tuple(sorted(league_ids or [])))
+def update_base_club_stats(league_ids):
+    if len(league_ids) > 0:
+        selection = snapshots.get().aggregates.select(league_ids)
+
+        club_stats = selection.club_stats()
+        highest_club_value = dict(zip(['market_value', 'position', 'pretty_name'], club_stats.highest))
+        lowest_club_value = dict(zip(['market_value', 'position', 'pretty_name'], club_stats.lowest))
+        mean_club_value = int(club_stats.mean)
+        median_club_value = int(club_stats.median)
 
         base_club_stats = [
             dbc.Col(
@@ -422,13 +567,23 @@ def update_dashboard(league_ids, filter):
             )
         ]
 
-        #########################
-        ### base-player-stats ###
-        #########################
-        highest_player_value = dict(players_.loc[players_['market_value'].idxmax()])
-        lowest_player_value = dict(players_.loc[players_['market_value'].idxmin()])
-        mean_player_value = int(players_['market_value'].mean())
-        median_player_value = int(players_['market_value'].median())
+        return base_club_stats
+
+@app.callback(
+    Output('base-player-stats', 'children'),
+    [
+        Input('league-dropdown', 'value')
+    ])
+@callback_cache.memoize(lambda league_ids: tuple(sorted(league_ids or [])))
+def update_base_player_stats(league_ids):
+    if len(league_ids) > 0:
+        selection = snapshots.get().aggregates.select(league_ids)
+
+        player_stats = selection.player_stats()
+        highest_player_value = dict(zip(['market_value', 'position', 'pretty_name'], player_stats.highest))
+        lowest_player_value = dict(zip(['market_value', 'position', 'pretty_name'], player_stats.lowest))
+        mean_player_value = int(player_stats.mean)
+        median_player_value = int(player_stats.median)
 
         base_player_stats = [
             dbc.Col(
@@ -508,108 +663,49 @@ def update_dashboard(league_ids, filter):
             )
         ]
 
-        #####################
-        ### density-pitch ###
-        #####################
-        pitch = Pitch(players_)
-
-        # Check filter
-        if filter == "SUM":
-            pitch.position_data = pitch.marketvalue_sum_by_position()
-        elif filter == "MEAN":
-            pitch.position_data = pitch.marketvalue_mean_by_position()
-        elif filter == "MAX":
-            pitch.position_data = pitch.marketvalue_max_by_position()
-        else:
-            pass
-
-        pitch.position_data = pitch.convert_position_to_coordinates()
-
-        # Insert row at index 0 containing values [0, 0, 0] for heatmap X and Y axis scaling
-        pitch.position_data.loc[-1] = [0, 0, 0]
-        pitch.position_data.index = pitch.position_data.index + 1 
-        pitch.position_data = pitch.position_data.sort_index()
-
-        # Append row containing values [130, 90, 0] for heatmap X and Y axis scaling
-        end = pd.DataFrame([[130, 90, 0]], columns=["X", "Y", "market_value"])
-        pitch.position_data = pitch.position_data.append(end, ignore_index=True)
-
-        img = Image.open('./assets/pitch.jpg')
-        density_pitch = go.Figure()
-
-        density_pitch.add_trace(go.Contour(
-                x=pitch.position_data["X"], 
-                y=pitch.position_data["Y"], 
-                z=pitch.position_data["market_value"],
-                showscale=True, 
-                connectgaps=True, 
-                hoverinfo="none",
-                opacity=0.5))
-
-
-        # axis hide、yaxis reversed
-        density_pitch.update_layout(
-            autosize=False,
-            width=1047,
-            height=705,
-            xaxis=dict(visible=False,autorange=True),
-            yaxis=dict(visible=False,autorange='reversed')
-        )
+        return base_player_stats
 
-        # background image add
-        density_pitch.add_layout_image(
-            dict(source=img,
-                xref='x',
-                yref='y',
-                x=0,
-                y=0,
-                sizex=130,
-                sizey=90,
-                sizing='stretch',
-                opacity=1,
-                layer='below')
-        )
+@app.callback(
+    Output('density-pitch', 'figure'),
+    [
+        Input('league-dropdown', 'value'),
+        Input('density-pitch-dropdown', 'value')
+    ])
+@callback_cache.memoize(lambda league_ids, filter: (tuple(sorted(league_ids or [])), filter))
+def update_density_pitch(league_ids, filter):
+    if len(league_ids) > 0:
+        selection = snapshots.get().aggregates.select(league_ids)
+
+        # The smoothed grid is computed once per league selection and aggregation
+        aggregation = {"SUM": "sum", "MEAN": "mean", "MAX": "max"}[filter]
+        density_pitch = density_pitch_figure(*selection.market_value_density(aggregation))
 
-        return fig, players_table, base_club_stats, base_player_stats, density_pitch
+        return density_pitch
+
+@app.callback(
+    [
+        Output('players-table', 'data'),
+        Output('players-table', 'page_count'),
+        # The page is moved back when a narrower selection or filter leaves it past the last page
+        Output('players-table', 'page_current')
+    ],
+    [
+        Input('league-dropdown', 'value'),
+        Input('players-table', 'page_current'),
+        Input('players-table', 'page_size'),
+        Input('players-table', 'sort_by'),
+        Input('players-table', 'filter_query')
+    ])
+def update_players_table(league_ids, page_current, page_size, sort_by, filter_query):
+    snapshot = snapshots.get()
+    positions = snapshot.aggregates.select(league_ids).positions()
+    return snapshot.players_table_index.query(positions, page_current or 0, page_size, sort_by, filter_query)
 
 @app.callback(
         Output('pie-chart-team-dropdown', 'options'), 
         Input('pie-chart-league-dropdown', 'value'))
 def set_team_options(selected_league):
-    all_options = {
-        'GB1': ['Wolverhampton Wanderers', 'West Ham United', 'Sheffield United',
-                'Fc Liverpool', 'Manchester City', 'Leicester City',
-                'Leeds United', 'Aston Villa', 'Fc Arsenal', 'Fc Burnley',
-                'Crystal Palace', 'Fc Fulham', 'Newcastle United', 'Fc Chelsea',
-                'Fc Southampton', 'Manchester United', 'Tottenham Hotspur',
-                'Fc Everton', 'Brighton Amp Hove Albion', 'West Bromwich Albion'],
-        'L1': ['Vfb Stuttgart', 'Sv Werder Bremen', '1 Fc Koln',
-                'Eintracht Frankfurt', 'Tsg 1899 Hoffenheim', 'Vfl Wolfsburg',
-                'Borussia Dortmund', 'Fc Bayern Munchen', 'Rasenballsport Leipzig',
-                'Arminia Bielefeld', 'Hertha Bsc', 'Fc Augsburg', 'Sc Freiburg',
-                'Bayer 04 Leverkusen', 'Borussia Monchengladbach', 'Fc Schalke 04',
-                '1 Fsv Mainz 05', '1 Fc Union Berlin'],
-        'ES1': ['Fc Sevilla', 'Fc Granada', 'Real Valladolid', 'Real Madrid',
-                'Sd Huesca', 'Ca Osasuna', 'Sd Eibar', 'Celta Vigo',
-                'Fc Villarreal', 'Fc Valencia', 'Fc Getafe', 'Fc Cadiz',
-                'Fc Barcelona', 'Atletico Madrid', 'Real Sociedad San Sebastian',
-                'Real Betis Sevilla', 'Athletic Bilbao', 'Ud Levante', 'Fc Elche',
-                'Deportivo Alaves'],
-        'IT1': ['Ssc Neapel', 'Spezia Calcio', 'Atalanta Bergamo', 'Fc Bologna',
-                'Fc Turin', 'Cagliari Calcio', 'Fc Crotone', 'Hellas Verona',
-                'Ac Mailand', 'Udinese Calcio', 'Inter Mailand', 'Ac Florenz',
-                'As Rom', 'Juventus Turin', 'Sampdoria Genua', 'Genua Cfc',
-                'Parma Calcio 1913', 'Lazio Rom', 'Benevento Calcio',
-                'Us Sassuolo'],
-        'FR1': ['Fc Nantes', 'Sco Angers', 'As Saint Etienne', 'Rc Lens',
-                'Fc Metz', 'Rc Strassburg Alsace', 'Stade Brest 29',
-                'Olympique Lyon', 'Fc Paris Saint Germain', 'Nimes Olympique',
-                'Montpellier Hsc', 'Stade Reims', 'As Monaco',
-                'Olympique Marseille', 'Dijon Fco', 'Losc Lille', 'Fc Lorient',
-                'Fc Girondins Bordeaux', 'Ogc Nizza', 'Fc Stade Rennes']
-
-    }
-    return [{'label': i, 'value': i} for i in all_options[selected_league]]
+    return [{'label': i, 'value': i} for i in snapshots.get().club_index.clubs(selected_league)]
 
 @app.callback(
     [
@@ -623,23 +719,17 @@ def set_team_options(selected_league):
         Input('pie-chart-team-dropdown', 'value')
     ]
 )
+@callback_cache.memoize(lambda league, team: (league, team))
 def update_pie_charts(league, team):
-    games_ = games[games['league_code'] == league]
-    advantage_results_league_fig = calculate_advantage_results(games_)
-
-    league_dict = {
-        'GB1': 'Premier League',
-        'L1': 'Bundesliga',
-        'ES1':'La Liga',
-        'IT1':'Serie A',
-        'FR1':'Ligue 1'
-    }
-    league_name = "{} Average 2020/2021".format(league_dict[league])
+    snapshot = snapshots.get()
+    club_index = snapshot.club_index
+    advantage_results_league_fig = calculate_advantage_results(snapshot.advantage_results_by_league.get(league, no_advantage_results))
+
+    league_name = "{} Average {}".format(club_index.league_name(league), club_index.season_label)
 
-    games__ = games.loc[(games['home_club_name'] == team) | (games['away_club_name'] == team)]
-    advantage_results_team_fig = calculate_advantage_results(games__)
+    advantage_results_team_fig = calculate_advantage_results(snapshot.advantage_results_by_team.get(team, no_advantage_results))
 
-    club_name = "{} 2020/2021".format(team)
+    club_name = "{} {}".format(team, club_index.season_label)
     
     return advantage_results_league_fig, advantage_results_team_fig, league_name, club_name
 
@@ -0,0 +1,55 @@
+"""
+    Compares answering the league selection aggregates of update_dashboard by filtering and regrouping the
+    players and clubs frames against combining the per-league partials of LeagueAggregates, for growing
+    player tables (the players are repeated --scales times).
+
+    Run from the repository root:
+        python -m benchmarks.aggregates
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from aggregates import LeagueAggregates
+from benchmarks.timing import best_of
+
+SELECTIONS = [["GB1"], ["GB1", "L1"], ["ES1", "IT1", "FR1", "L1", "GB1"]]
+
+def scan(players, clubs, league_ids):
+    players_ = players[players["league_id"].isin(league_ids)]
+    clubs_ = clubs[clubs["league_id"].isin(league_ids)]
+    players_.groupby(["club_name", "position"])["market_value"].sum().reset_index()
+    for df in (clubs_, players_):
+        df.loc[df["market_value"].idxmax()], df.loc[df["market_value"].idxmin()]
+        df["market_value"].mean(), df["market_value"].median()
+    players_.groupby("sub_position")["market_value"].sum()
+
+def combine(aggregates, league_ids):
+    aggregates.market_value_by_club_and_position(league_ids)
+    for stats in (aggregates.club_stats(league_ids), aggregates.player_stats(league_ids)):
+        stats.highest, stats.lowest, stats.mean, stats.median
+    aggregates.market_value_by_sub_position(league_ids, "sum")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    clubs = pd.read_csv("data/clubs_extended.csv")
+    base_players = pd.read_csv("data/players_extended.csv")
+
+    print(f"{'players':>8} {'build (ms)':>11} {'scan (ms)':>10} {'combine (ms)':>13}")
+    for scale in args.scales:
+        players = pd.concat([base_players] * scale, ignore_index=True)
+        start = time.perf_counter()
+        aggregates = LeagueAggregates(players, clubs)
+        build = time.perf_counter() - start
+
+        scan_time = sum(best_of(args.repeat, lambda: scan(players, clubs, league_ids)) for league_ids in SELECTIONS)
+        combine_time = sum(best_of(args.repeat, lambda: combine(aggregates, league_ids)) for league_ids in SELECTIONS)
+        print(f"{len(players):8} {build * 1000:11.2f} {scan_time * 1000:10.2f} {combine_time * 1000:13.2f}")
+
+if __name__ == "__main__":
+    main()
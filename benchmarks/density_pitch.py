@@ -0,0 +1,66 @@
+"""
+    Compares building the density pitch figure per call the old way (opening the pitch image, padding the data
+    with loc and DataFrame.append, building layout and background from scratch, a contour interpolated by the
+    browser) against filling the smoothed grid into the figure template built at startup. The grid is computed
+    once per league selection and aggregation, its computation is timed separately.
+    Both figures are serialized as Dash would do.
+
+    Run from the repository root:
+        python -m benchmarks.density_pitch
+"""
+import argparse
+import json
+
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+from PIL import Image
+
+import app
+from benchmarks.timing import best_of
+from pitch import Pitch
+
+def build_figure_per_call(position_data):
+    position_data = position_data.copy()
+    position_data.loc[-1] = [0, 0, 0]
+    position_data.index = position_data.index + 1
+    position_data = position_data.sort_index()
+    end = pd.DataFrame([[130, 90, 0]], columns=["X", "Y", "market_value"])
+    position_data = pd.concat([position_data, end], ignore_index=True)
+
+    img = Image.open('./assets/pitch.jpg')
+    density_pitch = go.Figure()
+    density_pitch.add_trace(go.Contour(
+        x=position_data["X"], y=position_data["Y"], z=position_data["market_value"],
+        showscale=True, connectgaps=True, hoverinfo="none", opacity=0.5))
+    density_pitch.update_layout(
+        autosize=False, width=1047, height=705,
+        xaxis=dict(visible=False, autorange=True), yaxis=dict(visible=False, autorange='reversed'))
+    density_pitch.add_layout_image(dict(
+        source=img, xref='x', yref='y', x=0, y=0, sizex=130, sizey=90, sizing='stretch', opacity=1, layer='below'))
+    return density_pitch
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    selection = app.snapshots.get().aggregates.select(["GB1", "L1", "ES1", "IT1", "FR1"])
+    pitch = Pitch(None)
+    pitch.position_data = selection.market_value_by_sub_position("sum")
+    position_data = pitch.convert_position_to_coordinates()
+    grid_time = best_of(args.repeat, pitch.density_grid)
+    grid = pitch.density_grid()
+    print(f"density grid: {grid_time * 1000:.2f} ms per league selection and aggregation")
+
+    serialize = lambda figure: json.dumps(figure, cls=plotly.utils.PlotlyJSONEncoder)
+    print(f"{'':12} {'build (ms)':>11} {'serialize (ms)':>15} {'payload (KiB)':>14}")
+    for label, build in (("per call", lambda: build_figure_per_call(position_data)), ("template", lambda: app.density_pitch_figure(*grid))):
+        build_time = best_of(args.repeat, build)
+        figure = build()
+        serialize_time = best_of(args.repeat, lambda: serialize(figure))
+        payload = serialize(figure)
+        print(f"{label:12} {build_time * 1000:11.2f} {serialize_time * 1000:15.2f} {len(payload) / 1024:14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+    Measures how much work each dashboard interaction triggers: which callbacks the change of an input fires,
+    how many outputs they recompute and how long they take. The callback outputs cache is bypassed and the
+    shared league selections are dropped before every interaction, so the timings are those of a cold request.
+
+    Exits with status 1 if an interaction fires a callback outside of its expected scope.
+
+    Run from the repository root:
+        python -m benchmarks.interactions
+"""
+import argparse
+import inspect
+import sys
+import time
+
+import app
+
+# Values of all callback inputs on page load
+INITIAL_STATE = {
+    ("league-dropdown", "value"): ["GB1"],
+    ("density-pitch-dropdown", "value"): "SUM",
+    ("players-table", "page_current"): 0,
+    ("players-table", "page_size"): 10,
+    ("players-table", "sort_by"): [],
+    ("players-table", "filter_query"): "",
+    ("pie-chart-league-dropdown", "value"): "GB1",
+    ("pie-chart-team-dropdown", "value"): "Manchester United"
+}
+
+# Changed input, new value and the callbacks that are expected to run
+INTERACTIONS = [
+    (("league-dropdown", "value"), ["GB1", "L1", "ES1"],
+     {"update_bar_chart", "update_base_club_stats", "update_base_player_stats", "update_density_pitch", "update_players_table"}),
+    (("density-pitch-dropdown", "value"), "MEAN", {"update_density_pitch"}),
+    (("players-table", "page_current"), 3, {"update_players_table"}),
+    (("players-table", "sort_by"), [{"column_id": "age", "direction": "asc"}], {"update_players_table"}),
+    (("players-table", "filter_query"), "{age} > 25", {"update_players_table"}),
+    (("pie-chart-league-dropdown", "value"), "L1", {"set_team_options", "update_pie_charts"}),
+    (("pie-chart-team-dropdown", "value"), "Fc Bayern Munchen", {"update_pie_charts"})
+]
+
+def callback_graph():
+    """
+        Returns (name, function without caching, inputs, number of outputs) for every registered callback
+    """
+    graph = []
+    for output, callback in app.app.callback_map.items():
+        function = inspect.unwrap(callback["callback"])
+        inputs = [(entry["id"], entry["property"]) for entry in callback["inputs"]]
+        outputs = output.count("...") + 1 if output.startswith("..") else 1
+        graph.append((function.__name__, function, inputs, outputs))
+    return graph
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    graph = callback_graph()
+    total_outputs = sum(outputs for _, _, _, outputs in graph)
+    failed = False
+
+    print(f"{'interaction':40} {'callbacks':>9} {'outputs':>9} {'time (ms)':>10}  callbacks fired")
+    for changed, value, expected in INTERACTIONS:
+        state = {**INITIAL_STATE, changed: value}
+        fired = [(name, function, inputs, outputs) for name, function, inputs, outputs in graph if changed in inputs]
+
+        timings = {}
+        for _ in range(args.repeat):
+            app.snapshots.get().aggregates.selections.clear()
+            for name, function, inputs, _ in fired:
+                start = time.perf_counter()
+                function(*[state[key] for key in inputs])
+                timing = time.perf_counter() - start
+                timings[name] = min(timings.get(name, timing), timing)
+
+        names = {name for name, _, _, _ in fired}
+        outputs = sum(outputs for _, _, _, outputs in fired)
+        label = f"{changed[0]}.{changed[1]}"
+        details = ", ".join(f"{name} {timings[name] * 1000:.1f}" for name in sorted(names))
+        print(f"{label:40} {len(fired):9} {outputs:>4} / {total_outputs:<2} {sum(timings.values()) * 1000:10.1f}  {details}")
+        if names != expected:
+            failed = True
+            print(f"  unexpected scope: fired {sorted(names)}, expected {sorted(expected)}")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+    Load test of the dashboard over HTTP: simulated users replay the /_dash-update-component requests the
+    browser sends for their interactions against a locally started gunicorn serving app:server (or any
+    running server with --url).
+
+    Every user picks one interaction after the other:
+        league     selects a few leagues in the league dropdown (bar chart, stats, density pitch, players table)
+        density    selects another aggregation in the density pitch dropdown
+        team       selects a league and then one of its teams for the pie charts
+    The request payloads are built from the callbacks the server reports at /_dash-dependencies, exactly as
+    the browser would send them. Reports the throughput and p50/p95/p99 latency of every callback, so the
+    number of gunicorn workers and threads can be chosen from measurements.
+
+    Run from the repository root:
+        python -m benchmarks.load --workers 2 --threads 4 --users 8 --duration 30
+        python -m benchmarks.load --url http://127.0.0.1:8050 --users 4
+"""
+import argparse
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+
+LEAGUE_IDS = ["GB1", "L1", "ES1", "IT1", "FR1"]
+DENSITY_FILTERS = ["SUM", "MEAN", "MAX"]
+
+# Inputs of a user who just opened the page
+INITIAL_STATE = {
+    "league-dropdown.value": ["GB1"],
+    "density-pitch-dropdown.value": "SUM",
+    "players-table.page_current": 0,
+    "players-table.page_size": 10,
+    "players-table.sort_by": [],
+    "players-table.filter_query": "",
+    "pie-chart-league-dropdown.value": "GB1",
+    "pie-chart-team-dropdown.value": "Manchester United"
+}
+
+def parse_outputs(output):
+    """
+        Splits the output of a dependency, e.g. "..a.figure...b.children.." for several outputs
+    """
+    if output.startswith(".."):
+        return [{"id": item.rsplit(".", 1)[0], "property": item.rsplit(".", 1)[1]} for item in output[2:-2].split("...")]
+    component, prop = output.rsplit(".", 1)
+    return {"id": component, "property": prop}
+
+class Dashboard:
+    """
+        The callbacks of the served dashboard and the request payloads of changing one of their inputs
+    """
+    def __init__(self, url, session):
+        self.url = url.rstrip("/")
+        self.dependencies = session.get(f"{self.url}/_dash-dependencies", timeout=30).json()
+
+    def payloads(self, changed, state):
+        """
+            Returns (callback, payload) of every callback fired by changing the input changed (e.g.
+            "league-dropdown.value") given the current values of all inputs in state
+        """
+        payloads = []
+        for dependency in self.dependencies:
+            inputs = [f"{entry['id']}.{entry['property']}" for entry in dependency["inputs"]]
+            if changed not in inputs:
+                continue
+            outputs = parse_outputs(dependency["output"])
+            payloads.append((callback_name(outputs), {
+                "output": dependency["output"],
+                "outputs": outputs,
+                "inputs": [dict(entry, value=state.get(key)) for entry, key in zip(dependency["inputs"], inputs)],
+                "changedPropIds": [changed],
+                "state": []
+            }))
+        return payloads
+
+def callback_name(outputs):
+    """
+        Names a callback by its first output, e.g. "pie-chart-league.figure +3" for a callback with four outputs
+    """
+    if not isinstance(outputs, list):
+        return f"{outputs['id']}.{outputs['property']}"
+    return f"{outputs[0]['id']}.{outputs[0]['property']}" + (f" +{len(outputs) - 1}" if len(outputs) > 1 else "")
+
+class Recorder:
+    """
+        Latencies and errors of the requests of every callback
+    """
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+        self.recording = False
+
+    def add(self, name, latency, ok):
+        if not self.recording:
+            return
+        with self.lock:
+            self.latencies.setdefault(name, []).append(latency)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, duration):
+        lines = [f"{'callback':36} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}"]
+        names = sorted(self.latencies)
+        if not names:
+            return "No requests were recorded"
+        for name in names + ["total"]:
+            latencies = np.concatenate([self.latencies[name] for name in names]) if name == "total" else np.array(self.latencies[name])
+            errors = sum(self.errors.values()) if name == "total" else self.errors.get(name, 0)
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+            lines.append(f"{name:36} {len(latencies):9} {errors:7} {len(latencies) / duration:8.1f} {p50:9.1f} {p95:9.1f} {p99:9.1f}")
+        return "\n".join(lines)
+
+def simulate_user(dashboard, recorder, stop, seed, think_time):
+    rng = random.Random(seed)
+    session = requests.Session()
+    state = dict(INITIAL_STATE)
+
+    def send(changed, value):
+        state[changed] = value
+        responses = {}
+        for name, payload in dashboard.payloads(changed, state):
+            start = time.perf_counter()
+            try:
+                response = session.post(f"{dashboard.url}/_dash-update-component", json=payload, timeout=60)
+                ok = response.status_code == 200
+                responses[name] = response.json() if ok else None
+            except requests.RequestException:
+                ok = False
+            recorder.add(name, time.perf_counter() - start, ok)
+        return responses
+
+    while not stop.is_set():
+        interaction = rng.choice(["league", "density", "team"])
+        if interaction == "league":
+            send("league-dropdown.value", rng.sample(LEAGUE_IDS, rng.randint(1, len(LEAGUE_IDS))))
+        elif interaction == "density":
+            send("density-pitch-dropdown.value", rng.choice(DENSITY_FILTERS))
+        else:
+            # The team dropdown is filled by the league selection, the user then picks one of its teams
+            responses = send("pie-chart-league-dropdown.value", rng.choice(LEAGUE_IDS))
+            options = (responses.get("pie-chart-team-dropdown.options") or {}).get("response", {})
+            options = options.get("pie-chart-team-dropdown", {}).get("options") or []
+            if options:
+                send("pie-chart-team-dropdown.value", rng.choice(options)["value"])
+        if think_time > 0:
+            stop.wait(rng.expovariate(1 / think_time))
+
+def start_server(workers, threads, port, timeout):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:server", "--config", "gunicorn.conf.py",
+         "--workers", str(workers), "--threads", str(threads), "--bind", f"127.0.0.1:{port}"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if server.poll() is not None:
+            break
+        try:
+            if requests.get(f"{url}/_dash-dependencies", timeout=5).status_code == 200:
+                return server, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gunicorn did not start")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="load test a running server instead of starting gunicorn")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8070)
+    parser.add_argument("--users", type=int, default=4, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of recorded load")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of load before recording")
+    parser.add_argument("--think-time", type=float, default=0, help="mean pause between the interactions of a user in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    url = args.url
+    if url is None:
+        server, url = start_server(args.workers, args.threads, args.port, timeout=120)
+    try:
+        dashboard = Dashboard(url, requests.Session())
+        recorder = Recorder()
+        stop = threading.Event()
+        users = [
+            threading.Thread(target=simulate_user, args=(dashboard, recorder, stop, args.seed + user, args.think_time), daemon=True)
+            for user in range(args.users)
+        ]
+        for user in users:
+            user.start()
+        time.sleep(args.warmup)
+        recorder.recording = True
+        time.sleep(args.duration)
+        recorder.recording = False
+        stop.set()
+        for user in users:
+            user.join()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    target = url if server is None else f"gunicorn, {args.workers} workers, {args.threads} threads"
+    print(f"{args.users} users for {args.duration:.0f} s against {target}")
+    print(recorder.report(args.duration))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+    Compares loading the dashboard data files with pd.read_csv against loading their columnar copies.
+
+    Run from the repository root:
+        python -m benchmarks.loading
+"""
+import argparse
+
+import pandas as pd
+
+from benchmarks.timing import best_of
+from columnar import columnar_path, read_columnar, write_columnar, csv_source
+
+DATA_FILES = ["data/clubs_extended.csv", "data/players_extended.csv", "data/games_extended.csv"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", default=DATA_FILES)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'file':40} {'csv (ms)':>10} {'columnar (ms)':>14} {'mmap (ms)':>10}")
+    totals = [0, 0, 0]
+    for csv_path in args.files:
+        write_columnar(pd.read_csv(csv_path), columnar_path(csv_path), source=csv_source(csv_path))
+        timings = [
+            best_of(args.repeat, lambda: pd.read_csv(csv_path)),
+            best_of(args.repeat, lambda: read_columnar(columnar_path(csv_path), mmap=False)),
+            best_of(args.repeat, lambda: read_columnar(columnar_path(csv_path)))
+        ]
+        totals = [total + timing for total, timing in zip(totals, timings)]
+        print(f"{csv_path:40} {timings[0] * 1000:10.2f} {timings[1] * 1000:14.2f} {timings[2] * 1000:10.2f}")
+    print(f"{'total':40} {totals[0] * 1000:10.2f} {totals[1] * 1000:14.2f} {totals[2] * 1000:10.2f}")
+
+if __name__ == "__main__":
+    main()
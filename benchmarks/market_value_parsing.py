@@ -0,0 +1,89 @@
+"""
+    Compares pages parsed per second of the BeautifulSoup based market value parsing used before
+    with the targeted extraction in market_value.py.
+
+    Run from the repository root:
+        python -m benchmarks.market_value_parsing path/to/saved/pages
+        python -m benchmarks.market_value_parsing --synthetic 500
+"""
+import argparse
+import glob
+import os
+import random
+import time
+
+from bs4 import BeautifulSoup
+
+from market_value import parse_market_value
+
+def parse_market_value_bs4(content):
+    """
+        Market value parsing as done in preprocessing.py before, kept as the baseline
+    """
+    html_content = BeautifulSoup(content, 'html.parser')
+    market_value_html = html_content.find_all("div", {"class": "dataMarktwert"})[0]
+    market_value = market_value_html.text.split("£")[1].split(" ")[0].strip('\t\r\n')
+    if market_value.endswith("m"):
+        return float(market_value.split("m")[0]) * 1000000
+    return float(market_value.split("Th.")[0]) * 1000
+
+def synthetic_page(rng):
+    """
+        Builds a page roughly the size and shape of a transfermarkt profile page
+    """
+    if rng.random() < 0.5:
+        value = "{:.2f}<span class=\"waehrung\">m</span>".format(rng.uniform(1, 120))
+    else:
+        value = "{}<span class=\"waehrung\">Th.</span>".format(rng.randrange(25, 975, 25))
+    rows = "".join(
+        f'<tr><td class="hauptlink"><a href="/spieler/{i}">Player {i}</a></td><td class="zentriert">{i % 90}</td></tr>'
+        for i in range(rng.randrange(300, 600))
+    )
+    return (
+        '<!DOCTYPE html><html><head><title>Profile</title>' + '<script>var x = 1;</script>' * 20 + '</head><body>'
+        + f'<div class="row"><div class="large-8 columns"><table class="items">{rows}</table></div>'
+        + f'<div class="dataMarktwert"><a href="/marktwertverlauf"><span class="waehrung">£</span>{value} '
+        + '<p class="right-td">Last update: 08.06.2021</p></a></div>'
+        + f'<div class="footer"><table>{rows}</table></div></div></body></html>'
+    ).encode("utf-8")
+
+def load_pages(directory):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.htm*"))):
+        with open(path, "rb") as f:
+            pages.append(f.read())
+    return pages
+
+def run(parser, pages):
+    values = []
+    start = time.perf_counter()
+    for page in pages:
+        try:
+            values.append(parser(page))
+        except (IndexError, ValueError):
+            values.append(None)
+    return len(pages) / (time.perf_counter() - start), values
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="?", help="directory with saved player profile pages (*.html)")
+    parser.add_argument("--synthetic", type=int, default=200, help="number of synthetic pages if no directory is given")
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = load_pages(args.pages)
+    else:
+        rng = random.Random(0)
+        pages = [synthetic_page(rng) for _ in range(args.synthetic)]
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1024:.0f} KiB on average")
+
+    before, values_before = run(parse_market_value_bs4, pages)
+    after, values_after = run(parse_market_value, pages)
+    agreeing = sum(a == b for a, b in zip(values_before, values_after))
+
+    print(f"BeautifulSoup (before): {before:10.1f} pages/s")
+    print(f"market_value (after):   {after:10.1f} pages/s  ({after / before:.0f}x)")
+    print(f"Same market value on {agreeing} of {len(pages)} pages")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+    Compares the dashboard frames with inferred column types against the frames with the declared schema
+    (see schema.py): memory use per frame and the time of the groupby and isin operations building the
+    startup indexes.
+
+    Run from the repository root:
+        python -m benchmarks.schema
+"""
+import argparse
+
+import pandas as pd
+
+from benchmarks.timing import best_of
+from schema import SCHEMAS, apply_schema, memory_report
+
+def operations(players, clubs, games):
+    return [
+        ("players by league", lambda: [group for group in players.groupby("league_id", sort=False, observed=True)]),
+        ("market value by club and position", lambda: players.groupby(["club_name", "position"], observed=True)["market_value"].sum()),
+        ("market value by sub_position", lambda: players.groupby("sub_position", observed=True)["market_value"].agg(["sum", "count", "max"])),
+        ("clubs by league", lambda: [group for group in clubs.groupby("league_id", sort=False, observed=True)]),
+        ("games of leagues (isin)", lambda: games[games["league_code"].isin(["GB1", "L1", "ES1"])]),
+        ("games of a club (isin)", lambda: games[games["home_club_name"].isin(["Manchester United"]) | games["away_club_name"].isin(["Manchester United"])])
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    inferred = {name: pd.read_csv(f"data/{name}_extended.csv") for name in SCHEMAS}
+    declared = {name: apply_schema(df, name) for name, df in inferred.items()}
+    print(memory_report([(name, inferred[name], declared[name]) for name in SCHEMAS]))
+    print()
+
+    print(f"{'operation':36} {'inferred (ms)':>14} {'declared (ms)':>14}")
+    for (label, before), (_, after) in zip(operations(**inferred), operations(**declared)):
+        print(f"{label:36} {best_of(args.repeat, before) * 1000:14.2f} {best_of(args.repeat, after) * 1000:14.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+    Offline benchmark suite of the pipeline stages of preprocessing.py, the dashboard callbacks and the Pitch
+    methods on synthetic data (see benchmarks/synthetic.py) at growing scales of today's data size.
+
+    Every stage is timed --repeat times (the fastest run is reported) and run once more under tracemalloc for
+    its peak memory. Callbacks are called without the callback outputs cache and with the league selections of
+    the snapshot dropped before each run, so their timings are those of a cold request. The results are compared
+    against a stored baseline: a stage is flagged when it got slower or needs more memory than the baseline by
+    more than --tolerance (and more than 1 ms or 1 MiB). Exits with status 1 if any stage is flagged.
+
+    Run from the repository root:
+        python -m benchmarks.suite
+        python -m benchmarks.suite --scales 1 10 --only pipeline callback
+    Store the results as the new baseline (e.g. after an intended change, on the machine used for comparisons):
+        python -m benchmarks.suite --save-baseline
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+# The benchmark swaps its own snapshots in, the data files must not be reloaded meanwhile
+os.environ["DATA_RELOAD_INTERVAL"] = "0"
+
+import app
+import preprocessing
+from benchmarks.synthetic import generate, write_dataset
+from benchmarks.timing import measure
+from pitch import Pitch
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+CURRENT_DATE = pd.Timestamp("2021-06-08")
+
+# Callback inputs, all leagues selected
+ALL_LEAGUES = ["GB1", "L1", "ES1", "IT1", "FR1"]
+CALLBACK_INPUTS = {
+    "update_bar_chart": [ALL_LEAGUES],
+    "update_base_club_stats": [ALL_LEAGUES],
+    "update_base_player_stats": [ALL_LEAGUES],
+    "update_density_pitch": [ALL_LEAGUES, "MEAN"],
+    "update_players_table": [ALL_LEAGUES, 2, 10, [{"column_id": "age", "direction": "asc"}], "{age} > 25"],
+    "set_team_options": ["GB1"],
+    "update_pie_charts": ["GB1", "Club 1"]
+}
+
+@contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def pipeline_stages(dataset, directory):
+    """
+        Returns (name, run, setup) of the offline stages of preprocessing.run_full, each set up with the outputs
+        of the stages before it. Scraping is replaced by the generated market values.
+    """
+    players, clubs = dataset["players"], dataset["clubs"]
+    games, appearances = dataset["games"], dataset["appearances"]
+
+    players_ = preprocessing.add_league_ids(players.copy(), clubs)
+    players_["market_value"] = dataset["market_values"]
+    appearances_ = preprocessing.calc_weighted_market_values(appearances.copy(), players_)
+    summary = preprocessing.summarize_appearances(appearances_, games)
+    built_players = preprocessing.build_players(players_.copy(), clubs, summary, CURRENT_DATE, directory)
+    clubs_ = preprocessing.calc_club_market_values(clubs.copy(), built_players)
+    outputs = {
+        "players": built_players,
+        "clubs": clubs_,
+        "appearances": appearances_,
+        "games": preprocessing.build_games(games.copy(), clubs_, summary["club_weighted_market_values"])
+    }
+
+    return [
+        ("add_league_ids", preprocessing.add_league_ids, lambda: (players.copy(), clubs)),
+        ("calc_weighted_market_values", preprocessing.calc_weighted_market_values, lambda: (appearances.copy(), players_)),
+        ("summarize_appearances", preprocessing.summarize_appearances, lambda: (appearances_, games)),
+        ("build_players", preprocessing.build_players, lambda: (players_.copy(), clubs, summary, CURRENT_DATE, directory)),
+        ("calc_club_market_values", preprocessing.calc_club_market_values, lambda: (clubs.copy(), built_players)),
+        ("build_games", preprocessing.build_games, lambda: (games.copy(), clubs_, summary["club_weighted_market_values"])),
+        ("write_outputs", preprocessing.write_outputs, lambda: (outputs, directory))
+    ]
+
+def callback_stages(snapshot):
+    """
+        Returns (name, run, setup) of every dashboard callback and calculate_advantage_results
+    """
+    callbacks = {}
+    for callback in app.app.callback_map.values():
+        function = inspect.unwrap(callback["callback"])
+        callbacks[function.__name__] = function
+
+    def cold(*args):
+        snapshot.aggregates.selections.clear()
+        return args
+
+    stages = [(name, callbacks[name], lambda inputs=inputs: cold(*inputs)) for name, inputs in CALLBACK_INPUTS.items()]
+    stages.append(("calculate_advantage_results", app.calculate_advantage_results, lambda: (snapshot.advantage_results_by_league["GB1"],)))
+    return stages
+
+def pitch_stages(snapshot, directory):
+    """
+        Returns (name, run, setup) of the Pitch methods used by the dashboard and the artwork export
+    """
+    def pitch_with(position_data):
+        pitch = Pitch(None)
+        pitch.position_data = position_data
+        return pitch
+
+    market_values = snapshot.aggregates.market_value_by_sub_position(ALL_LEAGUES, "sum")
+    coordinates = pitch_with(market_values).convert_position_to_coordinates()
+    return [
+        ("convert_position_to_coordinates", Pitch.convert_position_to_coordinates, lambda: (pitch_with(market_values),)),
+        ("density_grid", Pitch.density_grid, lambda: (pitch_with(coordinates),)),
+        ("draw", Pitch.draw, lambda: (pitch_with(None), os.path.join(directory, "pitch.png")))
+    ]
+
+def run_suite(scales, repeat, groups):
+    """
+        Returns {group.stage: {scale: {"seconds": ..., "peak_bytes": ...}}}, printing every result
+    """
+    results = {}
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            dataset = generate(scale)
+            print(f"scale {scale}: {len(dataset['players'])} players, {len(dataset['clubs'])} clubs, "
+                  f"{len(dataset['games'])} games, {len(dataset['appearances'])} appearances "
+                  f"(generated in {time.perf_counter() - start:.1f} s)")
+
+            stages = []
+            if "pipeline" in groups:
+                stages += [("pipeline", *stage) for stage in pipeline_stages(dataset, directory)]
+
+            if "callback" in groups or "pitch" in groups:
+                data_dir = os.path.join(directory, "data")
+                write_dataset(dataset, data_dir)
+                with working_directory(directory):
+                    seconds, peak = measure(lambda: app.DataSnapshot(1), repeat=1)
+                    snapshot = app.DataSnapshot(1)
+                record(results, "callback.DataSnapshot", scale, seconds, peak)
+                app.snapshots.current = snapshot
+                if "callback" in groups:
+                    stages += [("callback", *stage) for stage in callback_stages(snapshot)]
+                if "pitch" in groups:
+                    stages += [("pitch", *stage) for stage in pitch_stages(snapshot, directory)]
+
+            for group, name, run, setup in stages:
+                seconds, peak = measure(run, setup, repeat)
+                record(results, f"{group}.{name}", scale, seconds, peak)
+            del dataset, stages
+    return results
+
+def record(results, stage, scale, seconds, peak):
+    results.setdefault(stage, {})[str(scale)] = {"seconds": seconds, "peak_bytes": peak}
+    print(f"  {stage:46} {seconds * 1000:10.2f} ms {peak / 1024 ** 2:9.1f} MiB")
+
+def compare(results, baseline, tolerance):
+    """
+        Returns the lines of the comparison table and whether any stage regressed
+    """
+    lines = [f"{'stage':46} {'scale':>5} {'ms':>10} {'baseline':>10} {'change':>7} {'MiB':>8} {'baseline':>9} {'change':>7}"]
+    regressed = False
+    for stage, scales in results.items():
+        for scale, result in scales.items():
+            base = baseline.get(stage, {}).get(scale)
+            if base is None:
+                lines.append(f"{stage:46} {scale:>5} {result['seconds'] * 1000:10.2f} {'-':>10} {'':7} {result['peak_bytes'] / 1024 ** 2:8.1f}")
+                continue
+            time_change = result["seconds"] / base["seconds"] - 1 if base["seconds"] else 0
+            memory_change = result["peak_bytes"] / base["peak_bytes"] - 1 if base["peak_bytes"] else 0
+            slower = time_change > tolerance and result["seconds"] - base["seconds"] > 0.001
+            larger = memory_change > tolerance and result["peak_bytes"] - base["peak_bytes"] > 1024 ** 2
+            flags = " ".join(flag for flag, raised in (("SLOWER", slower), ("MORE MEMORY", larger)) if raised)
+            regressed |= slower or larger
+            lines.append(
+                f"{stage:46} {scale:>5} {result['seconds'] * 1000:10.2f} {base['seconds'] * 1000:10.2f} {time_change:+7.0%} "
+                f"{result['peak_bytes'] / 1024 ** 2:8.1f} {base['peak_bytes'] / 1024 ** 2:9.1f} {memory_change:+7.0%}  {flags}"
+            )
+    return lines, regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", choices=["pipeline", "callback", "pitch"], default=["pipeline", "callback", "pitch"])
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    results = run_suite(args.scales, args.repeat, args.only)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"Saved the results as baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, store one with --save-baseline")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    lines, regressed = compare(results, baseline, args.tolerance)
+    print()
+    print("\n".join(lines))
+    sys.exit(1 if regressed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+    Synthetic pipeline inputs shaped like the transfermarkt data of the top 5 leagues, scaled from today's
+    size (scale 1: 98 clubs, about 2800 players, 1900 games and 52000 appearances) up to any multiple.
+    Every league gets scale times as many clubs, every club the usual squad and season of 38 games, so all
+    tables grow linearly. Market values and club coordinates, which the pipeline scrapes and geocodes, are
+    generated as well. The same scale and seed always give the same data.
+
+    Write a dataset in the layout app.py reads, e.g. to try the dashboard at 10 times today's size:
+        python -m benchmarks.synthetic --scale 10 --output /tmp/synthetic/data
+"""
+import argparse
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+LEAGUE_IDS = ["GB1", "ES1", "L1", "IT1", "FR1"]
+CLUBS_PER_LEAGUE = [20, 20, 18, 20, 20]
+PLAYERS_PER_CLUB = 29
+GAMES_PER_CLUB = 38
+APPEARANCES_PER_SIDE = 14
+
+# Share of the players per (position, sub_position) in today's data, goalkeepers have no sub_position in the inputs
+POSITIONS = {
+    ("Attack", "Centre-Forward"): 361, ("Attack", "Left Winger"): 164, ("Attack", "Right Winger"): 185,
+    ("Attack", "Second Striker"): 28, ("Defender", "Centre-Back"): 496, ("Defender", "Left-Back"): 210,
+    ("Defender", "Right-Back"): 226, ("Goalkeeper", None): 325, ("Midfield", "Attacking Midfield"): 180,
+    ("Midfield", "Central Midfield"): 350, ("Midfield", "Defensive Midfield"): 219,
+    ("Midfield", "Left Midfield"): 36, ("Midfield", "Right Midfield"): 23
+}
+
+def generate_clubs(rng, scale):
+    league_ids = np.repeat(LEAGUE_IDS, np.array(CLUBS_PER_LEAGUE) * scale)
+    club_ids = np.arange(1, len(league_ids) + 1)
+    names = np.char.add("club-", club_ids.astype(str))
+    return pd.DataFrame({
+        "club_id": club_ids,
+        "name": names,
+        "pretty_name": np.char.add("Club ", club_ids.astype(str)),
+        "domestic_competition": league_ids,
+        "league_id": league_ids
+    })
+
+def generate_players(rng, clubs):
+    club_ids = np.repeat(clubs["club_id"].to_numpy(), PLAYERS_PER_CLUB)
+    player_ids = np.arange(1, len(club_ids) + 1)
+    names = np.char.add("player-", player_ids.astype(str))
+
+    weights = np.array(list(POSITIONS.values()), dtype=float)
+    positions = rng.choice(len(POSITIONS), size=len(player_ids), p=weights / weights.sum())
+    position_names = np.array([position for position, _ in POSITIONS], dtype=object)[positions]
+    sub_positions = np.array([sub_position for _, sub_position in POSITIONS], dtype=object)[positions]
+
+    birth_dates = pd.Timestamp("1984-01-01") + pd.to_timedelta(rng.integers(0, 21 * 365, len(player_ids)), unit="D")
+    players = pd.DataFrame({
+        "player_id": player_ids,
+        "club_id": club_ids,
+        "name": names,
+        "pretty_name": np.char.add("Player ", player_ids.astype(str)),
+        "country_of_birth": rng.choice(["England", "Spain", "Germany", "Italy", "France", "Brazil"], len(player_ids)),
+        "country_of_citizenship": rng.choice(["England", "Spain", "Germany", "Italy", "France", "Brazil"], len(player_ids)),
+        "date_of_birth": birth_dates.strftime("%Y-%m-%d"),
+        "position": position_names,
+        "sub_position": sub_positions,
+        "foot": rng.choice(["Right", "Left", "Both"], len(player_ids), p=[0.7, 0.25, 0.05]),
+        "height_in_cm": rng.integers(165, 200, len(player_ids)),
+        "url": np.char.add(np.char.add("https://www.transfermarkt.co.uk/", names), np.char.add("/profil/spieler/", player_ids.astype(str)))
+    })
+    return players
+
+def generate_market_values(rng, players):
+    """
+        Returns a market value per player in steps of 25,000 euros, skewed like the scraped values
+    """
+    return (np.round(rng.lognormal(15, 1.3, len(players)) / 25000) * 25000).astype("int64")
+
+def generate_games(rng, clubs):
+    """
+        Every club plays GAMES_PER_CLUB / 2 home games against random clubs of its league
+    """
+    games = []
+    for league_id, league_clubs in clubs.groupby("league_id", sort=False):
+        club_ids = league_clubs["club_id"].to_numpy()
+        home = np.repeat(club_ids, GAMES_PER_CLUB // 2)
+        # A random other club of the same league
+        offsets = rng.integers(1, len(club_ids), len(home))
+        away = club_ids[(np.searchsorted(club_ids, home) + offsets) % len(club_ids)]
+        games.append(pd.DataFrame({"league_code": league_id, "home_club_id": home, "away_club_id": away}))
+    games = pd.concat(games, ignore_index=True)
+
+    game_ids = np.arange(1, len(games) + 1)
+    rounds = rng.integers(1, GAMES_PER_CLUB + 1, len(games))
+    dates = pd.Timestamp("2020-08-21") + pd.to_timedelta((rounds - 1) * 7 + rng.integers(0, 3, len(games)), unit="D")
+    games.insert(0, "game_id", game_ids)
+    games.insert(2, "season", 2020)
+    games.insert(3, "round", np.char.add(rounds.astype(str), ". Matchday"))
+    games.insert(4, "date", dates.strftime("%Y-%m-%d"))
+    games["home_club_goals"] = rng.poisson(1.48, len(games))
+    games["away_club_goals"] = rng.poisson(1.32, len(games))
+    games["url"] = np.char.add("https://www.transfermarkt.co.uk/spielbericht/index/spielbericht/", game_ids.astype(str))
+    return games
+
+def generate_appearances(rng, players, games):
+    """
+        APPEARANCES_PER_SIDE different players of each side's squad appear in every game
+    """
+    squads = players.sort_values("club_id", kind="stable")
+    squad_players = squads["player_id"].to_numpy()
+    squad_starts = pd.Series(np.arange(len(squads)), index=squads["club_id"].to_numpy()).groupby(level=0).min()
+    squad_sizes = squads.groupby("club_id").size()
+
+    appearances = []
+    for side in ["home", "away"]:
+        club_ids = np.repeat(games[f"{side}_club_id"].to_numpy(), APPEARANCES_PER_SIDE)
+        starts = squad_starts.reindex(club_ids).to_numpy()
+        sizes = squad_sizes.reindex(club_ids).to_numpy()
+        # Consecutive squad members from a random first one, so no player appears twice in a game
+        first = np.repeat(rng.integers(0, PLAYERS_PER_CLUB, len(games)), APPEARANCES_PER_SIDE)
+        members = (first + np.tile(np.arange(APPEARANCES_PER_SIDE), len(games))) % sizes
+        appearances.append(pd.DataFrame({
+            "player_id": squad_players[starts + members],
+            "game_id": np.repeat(games["game_id"].to_numpy(), APPEARANCES_PER_SIDE),
+            "league_id": np.repeat(games["league_code"].to_numpy(), APPEARANCES_PER_SIDE),
+            "player_club_id": club_ids
+        }))
+    appearances = pd.concat(appearances, ignore_index=True)
+
+    appearances.insert(2, "appearance_id", np.char.add(appearances["game_id"].to_numpy().astype(str), np.char.add("_", appearances["player_id"].to_numpy().astype(str))))
+    appearances["goals"] = rng.poisson(0.1, len(appearances))
+    appearances["assists"] = rng.poisson(0.08, len(appearances))
+    appearances["minutes_played"] = rng.choice([90, 90, 90, 75, 60, 45, 20, 10], len(appearances))
+    appearances["yellow_cards"] = rng.binomial(1, 0.12, len(appearances))
+    appearances["red_cards"] = rng.binomial(1, 0.005, len(appearances))
+    return appearances
+
+def generate_coordinates(rng, clubs):
+    """
+        Returns latitude and longitude of each club, spread over the area of today's clubs
+    """
+    return pd.DataFrame({
+        "latitude": rng.uniform(36.5, 55.0, len(clubs)),
+        "longitude": rng.uniform(-8.7, 17.1, len(clubs))
+    }, index=clubs.index)
+
+def generate(scale=1, seed=0):
+    """
+        Returns the pipeline inputs (players, clubs, games and appearances) at scale times today's size and the
+        market value of each player and coordinates of each club the pipeline would scrape and geocode
+    """
+    rng = np.random.default_rng(seed)
+    clubs = generate_clubs(rng, scale)
+    players = generate_players(rng, clubs)
+    games = generate_games(rng, clubs)
+    return {
+        "players": players,
+        "clubs": clubs,
+        "games": games,
+        "appearances": generate_appearances(rng, players, games),
+        "market_values": generate_market_values(rng, players),
+        "coordinates": generate_coordinates(rng, clubs)
+    }
+
+def build_extended(dataset, current_date=pd.Timestamp("2021-06-08"), data_dir="data"):
+    """
+        Runs the offline pipeline stages of preprocessing.py on a generated dataset, returns the players, clubs
+        and games as app.py reads them from the *_extended.csv files
+    """
+    import preprocessing
+
+    players, clubs = dataset["players"].copy(), dataset["clubs"].copy()
+    games, appearances = dataset["games"].copy(), dataset["appearances"].copy()
+    players = preprocessing.add_league_ids(players, clubs)
+    players["market_value"] = dataset["market_values"]
+    appearances = preprocessing.calc_weighted_market_values(appearances, players)
+    summary = preprocessing.summarize_appearances(appearances, games)
+    players = preprocessing.build_players(players, clubs, summary, current_date, data_dir)
+    clubs = preprocessing.calc_club_market_values(clubs, players)
+    games = preprocessing.build_games(games, clubs, summary["club_weighted_market_values"])
+    clubs = clubs.join(dataset["coordinates"])
+    return players, clubs, games
+
+def write_dataset(dataset, directory):
+    """
+        Writes the extended tables of a generated dataset and data/leagues.csv to directory
+    """
+    os.makedirs(directory, exist_ok=True)
+    players, clubs, games = build_extended(dataset, data_dir=directory)
+    players.to_csv(os.path.join(directory, "players_extended.csv"), index=False)
+    clubs.to_csv(os.path.join(directory, "clubs_extended.csv"), index=False)
+    games.to_csv(os.path.join(directory, "games_extended.csv"), index=False)
+    shutil.copy("data/leagues.csv", os.path.join(directory, "leagues.csv"))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+    write_dataset(generate(args.scale, args.seed), args.output)
+    print(f"Wrote the extended tables at scale {args.scale} to {args.output}")
+
+if __name__ == "__main__":
+    main()
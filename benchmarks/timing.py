@@ -0,0 +1,32 @@
+"""
+    Timing helpers shared by the benchmark scripts
+"""
+import time
+import tracemalloc
+
+def best_of(repeat, run, setup=lambda: ()):
+    """
+        Returns the fastest of repeat runs of run(*setup()) in seconds. setup is not timed.
+    """
+    timings = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        run(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def measure(run, setup=lambda: (), repeat=3):
+    """
+        Returns the fastest of repeat runs of run(*setup()) in seconds (see best_of) and the peak memory of one
+        more run in bytes
+    """
+    seconds = best_of(repeat, run, setup)
+    args = setup()
+    tracemalloc.start()
+    try:
+        run(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, peak
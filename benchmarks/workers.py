@@ -0,0 +1,89 @@
+"""
+    Measures the resident memory of the gunicorn master and each worker serving the dashboard, with the app
+    preloaded before fork (gunicorn.conf.py) and loaded by every worker on its own (gunicorn's defaults).
+
+    For every process the resident set (RSS), its proportional share (PSS, shared pages divided among the
+    processes mapping them) and its private pages are read from /proc/<pid>/smaps_rollup, so this runs on
+    Linux only. The sum of PSS is the memory the whole server actually takes.
+
+    Run from the repository root:
+        python -m benchmarks.workers --workers 4
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Reported after the app is loaded in a worker, the benchmark waits for all workers
+READY_HOOK = """
+import os
+
+def post_worker_init(worker):
+    open(os.path.join({ready_directory!r}, str(worker.pid)), "w").close()
+"""
+
+def memory(pid):
+    """
+        Returns RSS, PSS and private memory of the process in KiB
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return fields["Rss"], fields["Pss"], fields["Private_Clean"] + fields["Private_Dirty"]
+
+def serve(preload, workers, port, timeout):
+    """
+        Starts gunicorn, waits until all workers have loaded the app and returns the memory of the master and
+        of each worker and the startup time
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        config = os.path.join(directory, "gunicorn.conf.py")
+        with open(config, "w") as f:
+            if preload:
+                with open("gunicorn.conf.py") as base:
+                    f.write(base.read())
+            f.write(READY_HOOK.format(ready_directory=directory))
+
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "app:server", "--config", config, "--workers", str(workers), "--bind", f"127.0.0.1:{port}"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            ready = []
+            while len(ready) < workers:
+                if server.poll() is not None or time.perf_counter() - start > timeout:
+                    raise RuntimeError("gunicorn did not start all workers")
+                time.sleep(0.1)
+                ready = [int(name) for name in os.listdir(directory) if name.isdigit()]
+            startup = time.perf_counter() - start
+            # Let the workers finish their first requests' worth of setup
+            time.sleep(1)
+            return memory(server.pid), [memory(pid) for pid in sorted(ready)], startup
+        finally:
+            server.terminate()
+            server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8060)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    for label, preload in (("loaded per worker", False), ("preloaded", True)):
+        master, workers, startup = serve(preload, args.workers, args.port, args.timeout)
+        print(f"{label} ({args.workers} workers, ready after {startup:.1f} s)")
+        print(f"  {'process':10} {'RSS (MiB)':>10} {'PSS (MiB)':>10} {'private (MiB)':>14}")
+        for name, (rss, pss, private) in [("master", master)] + [(f"worker {i}", usage) for i, usage in enumerate(workers)]:
+            print(f"  {name:10} {rss / 1024:10.1f} {pss / 1024:10.1f} {private / 1024:14.1f}")
+        total_pss = master[1] + sum(pss for _, pss, _ in workers)
+        print(f"  {'total':10} {'':10} {total_pss / 1024:10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import csv
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+# Bodies are shared between urls with identical content, so each digest is only counted once
+TOTAL_SIZE_QUERY = "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM entries)"
+
+class ResponseCache:
+    """
+        Content-addressed on-disk cache for fetched pages.
+        Page bodies are stored once per sha256 digest under `directory/objects`, an sqlite index maps each url to
+        its digest together with fetch time and validators (ETag, Last-Modified) for conditional requests.
+        Entries older than `ttl` seconds are stale, the least recently used entries are evicted once the
+        stored bodies exceed `max_bytes`.
+    """
+    def __init__(self, directory, ttl=7 * 24 * 3600, max_bytes=500 * 1024 ** 2):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+
+        self.db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )
+        """)
+        self.db.commit()
+        # Running total of the stored bodies, kept up to date on every insert and delete
+        self.total = self.db.execute(TOTAL_SIZE_QUERY).fetchone()[0]
+        self.evict()
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def lookup(self, url):
+        """
+            Returns (content, is_fresh, validators) for a cached url or None if the url is not cached.
+            validators holds the request headers for a conditional request.
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT digest, fetched_at, etag, last_modified FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            digest, fetched_at, etag, last_modified = row
+            try:
+                with open(self.object_path(digest), "rb") as f:
+                    content = f.read()
+            except FileNotFoundError:
+                self.remove(url, digest)
+                self.db.commit()
+                return None
+            self.db.execute("UPDATE entries SET last_used = ? WHERE url = ?", (time.time(), url))
+            self.db.commit()
+
+        validators = {}
+        if etag:
+            validators["If-None-Match"] = etag
+        if last_modified:
+            validators["If-Modified-Since"] = last_modified
+        return content, time.time() - fetched_at < self.ttl, validators
+
+    def store(self, url, content, etag=None, last_modified=None):
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so an interrupted run never leaves a truncated object behind
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self.lock:
+            previous = self.db.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+            if previous is not None and previous[0] != digest:
+                self.remove(url, previous[0])
+            if self.db.execute("SELECT 1 FROM entries WHERE digest = ?", (digest,)).fetchone() is None:
+                self.total += len(content)
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, len(content), now, now, etag, last_modified)
+            )
+            self.db.commit()
+        self.evict()
+
+    def touch(self, url):
+        """
+            Marks a cached url as freshly fetched, e.g. after the server answered 304 Not Modified
+        """
+        now = time.time()
+        with self.lock:
+            self.db.execute("UPDATE entries SET fetched_at = ?, last_used = ? WHERE url = ?", (now, now, url))
+            self.db.commit()
+
+    def size(self):
+        with self.lock:
+            return self.total
+
+    def remove(self, url, digest):
+        """
+            Deletes the entry of url, and its body if no other url references it. Call with the lock held.
+        """
+        size = self.db.execute("SELECT size FROM entries WHERE url = ?", (url,)).fetchone()
+        self.db.execute("DELETE FROM entries WHERE url = ?", (url,))
+        if size is None or self.db.execute("SELECT 1 FROM entries WHERE digest = ?", (digest,)).fetchone() is not None:
+            return
+        try:
+            os.remove(self.object_path(digest))
+        except FileNotFoundError:
+            pass
+        self.total -= size[0]
+
+    def evict(self):
+        """
+            Removes the least recently used entries until the stored bodies fit into max_bytes
+        """
+        with self.lock:
+            if self.total <= self.max_bytes:
+                return
+            for url, digest in self.db.execute("SELECT url, digest FROM entries ORDER BY last_used").fetchall():
+                self.remove(url, digest)
+                if self.total <= self.max_bytes:
+                    break
+            self.db.commit()
+
+class MarketValueCheckpoint:
+    """
+        Append-only CSV checkpoint of scraped market values, so an interrupted scrape resumes where it stopped.
+        Each line holds player_id, market_value and the time it was scraped, the latest line per player wins.
+    """
+    columns = ["player_id", "market_value", "scraped_at"]
+
+    def __init__(self, path, max_age=7 * 24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not os.path.exists(path):
+            with open(path, "w", newline="") as f:
+                csv.writer(f).writerow(self.columns)
+        self.file = open(path, "a", newline="")
+        self.writer = csv.writer(self.file)
+
+    def load(self):
+        """
+            Returns the market values scraped within max_age as a series indexed by player_id
+        """
+        checkpoint = pd.read_csv(self.path, float_precision="round_trip")
+        checkpoint = checkpoint[checkpoint["scraped_at"] >= time.time() - self.max_age]
+        return checkpoint.drop_duplicates("player_id", keep="last").set_index("player_id")["market_value"]
+
+    def add(self, player_id, market_value):
+        self.writer.writerow([player_id, market_value, time.time()])
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class CoordinateCache:
+    """
+        Append-only CSV cache of geocoded club coordinates keyed by club name and country.
+        Coordinates do not go stale, the latest line per club wins.
+    """
+    columns = ["name", "country", "latitude", "longitude"]
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not os.path.exists(path):
+            with open(path, "w", newline="") as f:
+                csv.writer(f).writerow(self.columns)
+        self.coordinates = self.load()
+        self.file = open(path, "a", newline="")
+        self.writer = csv.writer(self.file)
+
+    def load(self):
+        """
+            Returns a dictionary mapping (name, country) to (latitude, longitude)
+        """
+        cache = pd.read_csv(self.path, float_precision="round_trip", keep_default_na=False, dtype={"name": str, "country": str})
+        cache = cache.drop_duplicates(["name", "country"], keep="last")
+        return {(name, country): (latitude, longitude)
+                for name, country, latitude, longitude in cache[self.columns].itertuples(index=False)}
+
+    def get(self, name, country):
+        return self.coordinates.get((name, country or ""))
+
+    def add(self, name, country, latitude, longitude):
+        self.coordinates[(name, country or "")] = (latitude, longitude)
+        self.writer.writerow([name, country or "", latitude, longitude])
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
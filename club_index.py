@@ -0,0 +1,66 @@
+"""
+    Index of leagues, clubs and games built once from the loaded data, so callbacks look clubs and games up
+    in dictionaries instead of keeping hardcoded lists or comparing club names across all games.
+"""
+import numpy as np
+import pandas as pd
+
+# Display names of the leagues, others are derived from data/leagues.csv
+LEAGUE_NAMES = {
+    'GB1': 'Premier League',
+    'L1': 'Bundesliga',
+    'ES1': 'La Liga',
+    'IT1': 'Serie A',
+    'FR1': 'Ligue 1'
+}
+
+def group_positions(keys, positions):
+    """
+        Returns a dictionary mapping each key to the sorted positions it occurs at, missing keys are left out
+    """
+    keys = pd.Series(keys)
+    return {key: np.sort(positions[indices]) for key, indices in keys.groupby(keys, sort=False).indices.items()}
+
+class ClubIndex:
+    """
+        The clubs of each league (sorted by name), the row positions of the games of each league and the row
+        positions of the home and away games of each club (by club name)
+    """
+    def __init__(self, clubs, games, leagues=None):
+        self.league_clubs = {
+            league_id: sorted(league_clubs["pretty_name"].dropna())
+            for league_id, league_clubs in clubs.groupby("league_id", sort=False, observed=True)
+        }
+
+        positions = np.arange(len(games))
+        self.league_games = group_positions(games["league_code"].to_numpy(), positions)
+        self.club_games = group_positions(
+            np.concatenate([games["home_club_name"].to_numpy(dtype=object), games["away_club_name"].to_numpy(dtype=object)]),
+            np.concatenate([positions, positions])
+        )
+
+        # Known leagues first in their usual order, any other league of the data after them
+        self.league_names = {league_id: name for league_id, name in LEAGUE_NAMES.items() if league_id in self.league_clubs}
+        names = {} if leagues is None else leagues.set_index("league_id")["name"].to_dict()
+        for league_id in sorted(self.league_clubs):
+            if league_id not in self.league_names:
+                self.league_names[league_id] = names.get(league_id, league_id).replace("-", " ").title()
+
+        # e.g. "2020/2021" or "2019/2020 - 2020/2021"
+        seasons = sorted({f"{season}/{season + 1}" for season in games["season"].unique()})
+        self.season_label = " - ".join(dict.fromkeys(seasons[:1] + seasons[-1:]))
+
+    def clubs(self, league_id):
+        return self.league_clubs.get(league_id, [])
+
+    def games_of_league(self, league_id):
+        return self.league_games.get(league_id, np.empty(0, dtype=int))
+
+    def games_of_club(self, club_name):
+        return self.club_games.get(club_name, np.empty(0, dtype=int))
+
+    def league_name(self, league_id):
+        return self.league_names.get(league_id, league_id)
+
+    def league_options(self):
+        return [{'label': name, 'value': league_id} for league_id, name in self.league_names.items()]
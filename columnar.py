@@ -0,0 +1,144 @@
+"""
+    Columnar, memory-mappable storage for the pipeline outputs.
+
+    A table is a directory holding one .npy file per column and a schema.json with the column order and dtypes.
+    Numeric columns are stored as they are and memory-mapped on load. String columns are dictionary encoded:
+    the .npy file holds integer codes (-1 for missing values) and schema.json the distinct values.
+    Nullable integer columns (e.g. age) get an additional <column>.mask.npy.
+
+    Convert existing CSV files with:
+        python columnar.py data/clubs_extended.csv data/players_extended.csv data/games_extended.csv
+"""
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = "schema.json"
+
+def columnar_path(csv_path):
+    """
+        Returns the directory of the columnar copy of a CSV file, e.g. data/columnar/players_extended
+    """
+    directory, filename = os.path.split(csv_path)
+    return os.path.join(directory, "columnar", os.path.splitext(filename)[0])
+
+def smallest_code_dtype(n):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def write_columnar(df, directory, source=None):
+    """
+        Writes df as a columnar table into directory. source optionally records size and mtime of the CSV file
+        the table was built from, so readers can tell whether it is outdated.
+        The table is written next to directory first and then moved into place.
+    """
+    tmp_directory = f"{directory}.tmp{os.getpid()}"
+    old_directory = f"{directory}.old{os.getpid()}"
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+    try:
+        columns = []
+        for position, (name, column) in enumerate(df.items()):
+            filename = f"{position}.npy"
+            path = os.path.join(tmp_directory, filename)
+            entry = {"name": name, "file": filename, "dtype": str(column.dtype)}
+
+            if isinstance(column.dtype, pd.CategoricalDtype) or column.dtype == object:
+                codes, categories = pd.factorize(column, sort=True)
+                np.save(path, codes.astype(smallest_code_dtype(len(categories))))
+                entry["encoding"] = "dictionary"
+                entry["categories"] = [c.item() if hasattr(c, "item") else c for c in categories]
+            elif isinstance(column.dtype, pd.api.extensions.ExtensionDtype):
+                np.save(path, column.to_numpy(dtype=column.dtype.numpy_dtype, na_value=0))
+                np.save(os.path.join(tmp_directory, f"{position}.mask.npy"), column.isna().to_numpy())
+                entry["encoding"] = "masked"
+            else:
+                np.save(path, column.to_numpy())
+                entry["encoding"] = "plain"
+            columns.append(entry)
+
+        with open(os.path.join(tmp_directory, SCHEMA_FILE), "w") as f:
+            json.dump({"columns": columns, "rows": len(df), "source": source}, f)
+
+        # Swap the new table in, readers either see the complete old or the complete new table
+        if os.path.exists(directory):
+            os.replace(directory, old_directory)
+        os.replace(tmp_directory, directory)
+    except BaseException:
+        # E.g. another process swapped its copy in first, no partial copies are left behind
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        if not os.path.exists(directory) and os.path.exists(old_directory):
+            os.replace(old_directory, directory)
+        raise
+    finally:
+        shutil.rmtree(old_directory, ignore_errors=True)
+
+def read_schema(directory):
+    with open(os.path.join(directory, SCHEMA_FILE)) as f:
+        return json.load(f)
+
+def read_columnar(directory, mmap=True, categorical=False):
+    """
+        Reads a columnar table. Numeric columns are memory-mapped read-only unless mmap is False.
+        Dictionary encoded columns are returned as object columns or, with categorical=True, as categoricals.
+    """
+    schema = read_schema(directory)
+    mmap_mode = "r" if mmap else None
+    data = {}
+    for entry in schema["columns"]:
+        values = np.load(os.path.join(directory, entry["file"]), mmap_mode=mmap_mode)
+        if entry["encoding"] == "dictionary":
+            categories = pd.Index(entry["categories"])
+            if categorical:
+                data[entry["name"]] = pd.Categorical.from_codes(np.asarray(values), categories=categories)
+            else:
+                strings = categories.to_numpy(dtype=object).take(values, mode="clip")
+                strings[np.asarray(values) == -1] = np.nan
+                data[entry["name"]] = strings
+        elif entry["encoding"] == "masked":
+            mask = np.load(os.path.join(directory, entry["file"].replace(".npy", ".mask.npy")))
+            data[entry["name"]] = pd.array(np.asarray(values), dtype=entry["dtype"]).copy()
+            data[entry["name"]][mask] = pd.NA
+        else:
+            data[entry["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+def csv_source(csv_path):
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def write_table(df, csv_path):
+    """
+        Writes df as CSV and as columnar table next to it
+    """
+    df.to_csv(csv_path, index=False)
+    write_columnar(df, columnar_path(csv_path), source=csv_source(csv_path))
+
+def load_table(csv_path, mmap=True):
+    """
+        Loads a table, preferring its columnar copy. The columnar copy is used when it was built from the
+        CSV file as it is now or when the CSV file is missing. Otherwise the CSV file is read and the columnar
+        copy is rebuilt, so the next load is fast again.
+    """
+    directory = columnar_path(csv_path)
+    if os.path.exists(os.path.join(directory, SCHEMA_FILE)):
+        if not os.path.exists(csv_path) or read_schema(directory)["source"] == csv_source(csv_path):
+            return read_columnar(directory, mmap=mmap)
+
+    df = pd.read_csv(csv_path)
+    try:
+        write_columnar(df, directory, source=csv_source(csv_path))
+    except OSError as e:
+        print(f"Could not write columnar copy of {csv_path}: {e}")
+    return df
+
+if __name__ == "__main__":
+    for csv_path in sys.argv[1:]:
+        write_columnar(pd.read_csv(csv_path), columnar_path(csv_path), source=csv_source(csv_path))
+        print(f"{csv_path} -> {columnar_path(csv_path)}")
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+def file_digest(path):
+    """
+        Returns the sha256 hex digest of a file
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def row_hashes(df, columns):
+    """
+        Returns the given id columns of df together with a hash over all values of each row
+    """
+    fingerprint = df[columns].reset_index(drop=True)
+    # Stored as signed integers so the hashes survive a round trip through CSV
+    fingerprint["row_hash"] = pd.util.hash_pandas_object(df, index=False).to_numpy().view("int64")
+    return fingerprint
+
+def diff_rows(current, previous, key):
+    """
+        Compares two row_hashes frames on the key columns.
+        Returns the rows of current that are new or changed and the rows of previous that were changed or removed
+    """
+    current_matched = current[key + ["row_hash"]].merge(previous[key + ["row_hash"]], on=key, how="left", suffixes=("", "_other"))
+    previous_matched = previous[key + ["row_hash"]].merge(current[key + ["row_hash"]], on=key, how="left", suffixes=("", "_other"))
+    changed = current[(current_matched["row_hash"] != current_matched["row_hash_other"]).to_numpy()]
+    outdated = previous[(previous_matched["row_hash"] != previous_matched["row_hash_other"]).to_numpy()]
+    return changed, outdated
+
+class InputFingerprints:
+    """
+        Fingerprints of the pipeline inputs of the last run, stored in state_dir.
+        Holds one digest per input file and one row_hashes frame per input.
+    """
+    def __init__(self, state_dir):
+        self.state_dir = state_dir
+        self.digests_path = os.path.join(state_dir, "digests.json")
+
+    def load_digests(self):
+        if not os.path.exists(self.digests_path):
+            return None
+        with open(self.digests_path) as f:
+            return json.load(f)
+
+    def load_rows(self, name):
+        path = os.path.join(self.state_dir, f"{name}_rows.csv")
+        if not os.path.exists(path):
+            return None
+        return pd.read_csv(path)
+
+    def clear(self):
+        """
+            Forgets the last run, e.g. after the outputs were written without recording fingerprints
+        """
+        if os.path.exists(self.digests_path):
+            os.remove(self.digests_path)
+
+    def save(self, digests, rows):
+        """
+            Stores the file digests and the row_hashes frame of each input.
+            The digests are written last, so an interrupted save never looks like a complete one.
+        """
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.clear()
+        for name, fingerprint in rows.items():
+            fingerprint.to_csv(os.path.join(self.state_dir, f"{name}_rows.csv"), index=False)
+        with open(self.digests_path, "w") as f:
+            json.dump(digests, f, indent=2)
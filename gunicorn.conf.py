@@ -0,0 +1,17 @@
+"""
+    Gunicorn configuration of the dashboard, read by `gunicorn app:server` (see Procfile).
+
+    The app is imported once in the master before the workers are forked, so the data, the startup indexes and
+    the imported libraries are loaded once and shared by all workers copy-on-write instead of being loaded by
+    every worker. Before forking, gc.freeze moves everything loaded so far out of the garbage collector's
+    generations, collections in the workers then do not write to (and thereby copy) the shared pages.
+
+    Workers and the port follow gunicorn's defaults, WEB_CONCURRENCY and PORT.
+    benchmarks/workers.py measures the resident memory per worker with and without preloading.
+"""
+import gc
+
+preload_app = True
+
+def pre_fork(server, worker):
+    gc.freeze()
@@ -1,45 +1,152 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import pandas as pd
-import gmaps
 import requests
-import os
 
-GMAPS_API_KEY = os.environ["GMAPS_API_KEY"]
-gmaps.configure(api_key=GMAPS_API_KEY)
+from cache import CoordinateCache
+from columnar import write_table
+from scraper import RateLimiter
 
-clubs = pd.read_csv("data/clubs_updated.csv")
+GOOGLE_MAPS_API_URL = 'https://maps.googleapis.com/maps/api/geocode/json'
 
 def get_country(league_id):
     league_country_dict = {'L1': 'de', 'ES1': 'es', 'GB1': 'gb', 'FR1': 'fr', 'IT1': 'it'}
-    return (league_country_dict[league_id])
-
-def get_geocoords(club, country):
-    GOOGLE_MAPS_API_URL = 'https://maps.googleapis.com/maps/api/geocode/json'
-    
-    params = {
-        'address': club,
-        'region': country,
-        'key': GMAPS_API_KEY
-    }
-    
-    response = requests.get(GOOGLE_MAPS_API_URL, params=params).json()
-    print(response)
-    result = response['results'][0]
-
-    latitude = result['geometry']['location']['lat']
-    longitude = result['geometry']['location']['lng']
-    address = result['formatted_address']
-    print(f'{club}:\naddress: {address}\nlatitude: {latitude} | longitude: {longitude}')
-    return latitude, longitude
-    
-
-clubs['latitude'] = None
-clubs['longitude'] = None
-
-for ind, row in clubs.iterrows():
-    league_id = row['league_id']
-    country = get_country(league_id)
-    
-    club = row['name']
-    lat, lon = get_geocoords(club, country)
-    clubs.at[ind, 'latitude'] = lat
-    clubs.at[ind, 'longitude'] = lon
\ No newline at end of file
+    # Clubs of other leagues are looked up without a region bias
+    return league_country_dict.get(league_id)
+
+class GeocodingError(Exception):
+    """
+        Raised when the geocoding backend answers with an error status
+    """
+
+class GoogleGeocoder:
+    """
+        Geocoding backend for the Google Maps geocoding API.
+        base_url points it to a local stand-in server answering with the same JSON, no api_key is needed then.
+        Lookups over the query limit are retried with exponential backoff.
+        Any object with a geocode(address, region) method can be used as backend instead.
+    """
+    def __init__(self, api_key=None, base_url=GOOGLE_MAPS_API_URL, timeout=10, retries=3, backoff=1, session=None):
+        if api_key is None and base_url == GOOGLE_MAPS_API_URL:
+            raise ValueError("GMAPS_API_KEY has to be set to look up coordinates with the Google Maps geocoding API")
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = session or requests.Session()
+
+    def geocode(self, address, region):
+        """
+            Returns latitude and longitude of the first result or None if there is no result.
+            Raises GeocodingError with the error message of the API for any other status, e.g. REQUEST_DENIED
+            for an invalid key or OVER_QUERY_LIMIT once the retries are used up.
+        """
+        params = {'address': address}
+        if region is not None:
+            params['region'] = region
+        if self.api_key is not None:
+            params['key'] = self.api_key
+
+        for attempt in range(1, self.retries + 2):
+            response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+
+            status = data.get('status', 'OK')
+            if status == 'OVER_QUERY_LIMIT' and attempt <= self.retries:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+                continue
+            if status == 'ZERO_RESULTS' or (status == 'OK' and not data.get('results')):
+                return None
+            if status != 'OK':
+                raise GeocodingError(f"{status}: {data.get('error_message', 'no error message')}")
+            location = data['results'][0]['geometry']['location']
+            return location['lat'], location['lng']
+
+def seed_cache(cache, clubs_extended):
+    """
+        Adds the coordinates of clubs already resolved in a previous clubs_extended.csv to the cache
+    """
+    resolved = clubs_extended.dropna(subset=['latitude', 'longitude'])
+    added = 0
+    for name, league_id, latitude, longitude in resolved[['name', 'league_id', 'latitude', 'longitude']].itertuples(index=False):
+        country = get_country(league_id)
+        if cache.get(name, country) is None:
+            cache.add(name, country, latitude, longitude)
+            added += 1
+    return added
+
+def geocode_clubs(clubs, cache, create_backend, workers=4, rate=10):
+    """
+        Adds columns latitude and longitude to clubs. Clubs found in the cache (keyed by club name and country)
+        are not looked up again. Only for the misses a backend is created with create_backend() and queried
+        concurrently by `workers` threads, at most `rate` lookups per second.
+        Clubs without a result keep missing coordinates. Returns clubs and a list of (club, error) failures.
+    """
+    countries = clubs['league_id'].map(get_country)
+    keys = list(zip(clubs['name'], countries))
+    misses = list(dict.fromkeys(key for key in keys if cache.get(*key) is None))
+
+    failures = []
+    if misses:
+        backend = create_backend()
+        limiter = RateLimiter(rate)
+
+        def lookup(name, country):
+            limiter.wait()
+            return backend.geocode(name, country)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(lookup, name, country): (name, country) for name, country in misses}
+            for future in as_completed(futures):
+                name, country = futures[future]
+                try:
+                    result = future.result()
+                except (requests.RequestException, GeocodingError, ValueError) as e:
+                    failures.append((name, str(e)))
+                    continue
+                if result is None:
+                    failures.append((name, "no results"))
+                    continue
+                cache.add(name, country, *result)
+
+    coordinates = [cache.get(*key) or (None, None) for key in keys]
+    clubs['latitude'] = pd.to_numeric([latitude for latitude, _ in coordinates])
+    clubs['longitude'] = pd.to_numeric([longitude for _, longitude in coordinates])
+    print(f"Geocoding clubs: {len(clubs) - len(misses)} cached, {len(misses) - len(failures)} looked up, {len(failures)} failed")
+    return clubs, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Adds the coordinates of each club to clubs_updated.csv")
+    parser.add_argument("--clubs", default="data/clubs_updated.csv", help="input file (default: %(default)s)")
+    parser.add_argument("--output", default="data/clubs_extended.csv",
+                        help="output file, clubs already resolved in it are not looked up again (default: %(default)s)")
+    parser.add_argument("--cache", default="data/cache/coordinates.csv", help="coordinate cache (default: %(default)s)")
+    parser.add_argument("--base-url", default=GOOGLE_MAPS_API_URL,
+                        help="geocoding endpoint, e.g. a local stand-in server (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent lookups (default: %(default)s)")
+    parser.add_argument("--rate", type=float, default=10, help="lookups per second (default: %(default)s)")
+    args = parser.parse_args()
+
+    clubs = pd.read_csv(args.clubs)
+    cache = CoordinateCache(args.cache)
+    if os.path.exists(args.output):
+        seed_cache(cache, pd.read_csv(args.output))
+
+    # The api key is only read when there is something to look up
+    clubs, failures = geocode_clubs(
+        clubs, cache,
+        lambda: GoogleGeocoder(os.environ.get("GMAPS_API_KEY"), args.base_url),
+        workers=args.workers, rate=args.rate
+    )
+    cache.close()
+    for club, error in failures:
+        print(f"{club}: {error}")
+    write_table(clubs, args.output)
+
+if __name__ == "__main__":
+    main()
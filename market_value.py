@@ -0,0 +1,66 @@
+import html
+import re
+
+# Only the dataMarktwert element is of interest, everything around it is skipped without building a tree
+MARKET_VALUE_ELEMENT = re.compile(rb'<div[^>]*class="[^"]*\bdataMarktwert\b[^"]*"[^>]*>(.*?)</div>', re.S)
+TAG = re.compile(r"<[^>]+>")
+
+# Currency first (transfermarkt.co.uk / .com: "£45.00m", "€1.20bn", "£500Th.", "€750k")
+# or currency last (transfermarkt.de: "45,00 Mio. €", "500 Tsd. €", "1,20 Mrd. €"). The currency last form
+# needs a unit or a decimal comma and groups thousands by three, so a date like "12.05.2021" is never a value.
+MARKET_VALUE = re.compile(
+    r"(?P<currency>[€£$])\s*(?P<number>\d[\d,]*(?:\.\d+)?)\s*(?P<unit>bn|m|k|Th\.)?"
+    r"|(?<![\d.,])(?P<number_de>\d{1,3}(?:\.\d{3})*(?:,\d+)?)\s*(?P<unit_de>Mrd\.|Mio\.|Tsd\.)?\s*(?P<currency_de>[€£$])"
+)
+
+UNITS = {
+    None: 1,
+    "k": 1000, "Th.": 1000, "Tsd.": 1000,
+    "m": 1000000, "Mio.": 1000000,
+    "bn": 1000000000, "Mrd.": 1000000000
+}
+
+def extract_market_value_text(content):
+    """
+        Returns the text of the first dataMarktwert element of a player profile page (bytes or str)
+        or None if the page has no such element
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    match = MARKET_VALUE_ELEMENT.search(content)
+    if match is None:
+        return None
+    return html.unescape(TAG.sub("", match.group(1).decode("utf-8", errors="replace")))
+
+def parse_market_value_text(text):
+    """
+        Converts a market value string like "£45.00m", "€1.20bn", "£500Th." or "45,00 Mio. €" into a number.
+        Returns a tuple (market_value, currency), raises ValueError if text contains no market value.
+    """
+    match = MARKET_VALUE.search(text)
+    while match is not None:
+        if match.group("currency"):
+            number = match.group("number").replace(",", "")
+            unit, currency = match.group("unit"), match.group("currency")
+            return float(number) * UNITS[unit], currency
+        if match.group("unit_de") or "," in match.group("number_de"):
+            number = match.group("number_de").replace(".", "").replace(",", ".")
+            unit, currency = match.group("unit_de"), match.group("currency_de")
+            return float(number) * UNITS[unit], currency
+        # A plain number before a currency sign, e.g. "500 £45.00m", the sign may start the value
+        match = MARKET_VALUE.search(text, match.start() + 1)
+    raise ValueError(f"unexpected market value format: {text.strip()!r}")
+
+def parse_market_value(content, currency=None):
+    """
+        Extracts the market value from the content of a transfermarkt player profile page.
+        Raises ValueError if the page does not contain a market value or, if currency is given, the market
+        value is in another currency.
+    """
+    text = extract_market_value_text(content)
+    if text is None:
+        raise ValueError("no dataMarktwert element found")
+    market_value, found_currency = parse_market_value_text(text)
+    if currency is not None and found_currency != currency:
+        raise ValueError(f"market value in {found_currency} instead of {currency}: {text.strip()!r}")
+    return market_value
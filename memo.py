@@ -0,0 +1,107 @@
+"""
+    Bounded memoization of dashboard callback outputs.
+
+    Outputs are stored serialized as JSON, so cached figures and component trees are never shared and mutated
+    between requests. Entries are evicted least recently used beyond maxsize and expire after ttl seconds.
+    Keys include the version of the data snapshot the outputs were computed from (see snapshot.py), entries of
+    older versions are never served and are dropped once a newer version is seen.
+    Each gunicorn worker holds its own cache.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import plotly
+
+class CallbackCache:
+    """
+        LRU/TTL cache of serialized callback outputs. Keys are (callback name, data version, normalized inputs),
+        version() returns the version of the data callbacks currently compute from.
+        Hits and misses are counted per callback, see stats().
+    """
+    def __init__(self, maxsize=128, ttl=3600, version=lambda: 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = version
+        # Looked up on the first get or store, version() may start the snapshot watcher (see snapshot.py)
+        self.current_version = None
+        self.entries = OrderedDict()
+        self.hits = {}
+        self.misses = {}
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def check_version(self, version):
+        with self.lock:
+            if self.current_version is None:
+                self.current_version = version
+            elif version > self.current_version:
+                self.entries.clear()
+                self.current_version = version
+                self.invalidations += 1
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            stored_at, serialized = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return serialized
+
+    def put(self, key, serialized):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), serialized)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def count(self, counter, name):
+        with self.lock:
+            counter[name] = counter.get(name, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            names = sorted(set(self.hits) | set(self.misses))
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "version": self.current_version,
+                "invalidations": self.invalidations,
+                "callbacks": {name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)} for name in names}
+            }
+
+    def memoize(self, normalize):
+        """
+            Decorator caching the outputs of a callback. normalize(*args) turns the callback inputs into a
+            hashable key, e.g. sorting a multi-select dropdown value so the order of selection does not matter.
+        """
+        def decorator(callback):
+            name = callback.__name__
+
+            @wraps(callback)
+            def wrapper(*args):
+                version = self.version()
+                self.check_version(version)
+                key = (name, version, normalize(*args))
+                serialized = self.get(key)
+                if serialized is not None:
+                    self.count(self.hits, name)
+                    return json.loads(serialized)
+
+                self.count(self.misses, name)
+                outputs = callback(*args)
+                self.put(key, json.dumps(outputs, cls=plotly.utils.PlotlyJSONEncoder))
+                return outputs
+            return wrapper
+        return decorator
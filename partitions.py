@@ -0,0 +1,63 @@
+"""
+    Layout of the partitioned pipeline outputs (python preprocessing.py --partitioned).
+
+    Every (league_id, season) partition is written to data/partitions/<league_id>/<season>/ and holds
+    players_updated.csv, clubs_updated.csv, games_updated.csv and appearances_updated.csv.
+    Players are assigned to the league of their club and carry the totals of that season, so a player has one
+    row per season. combine_player_seasons turns them into one row per player with the totals of all seasons.
+
+    Load any subset, e.g. in a notebook:
+        from partitions import combine_player_seasons, load_partitions
+        players = load_partitions("players", league_ids=["GB1", "L1"], seasons=[2020])
+        players = combine_player_seasons(load_partitions("players", seasons=[2019, 2020]))
+"""
+import glob
+import os
+
+import pandas as pd
+
+from columnar import load_table
+
+# Totals of a season in the players tables, summed up over the seasons of a player
+season_total_columns = ["games", "minutes_played", "goals", "assists", "wins", "draws", "losses", "yellow_cards", "red_cards"]
+
+def partition_dir(league_id, season, data_dir="data"):
+    return os.path.join(data_dir, "partitions", str(league_id), str(season))
+
+def list_partitions(data_dir="data"):
+    """
+        Returns all (league_id, season) partitions written so far
+    """
+    partitions = []
+    for path in sorted(glob.glob(os.path.join(data_dir, "partitions", "*", "*"))):
+        league_dir, season = os.path.split(path)
+        partitions.append((os.path.basename(league_dir), int(season)))
+    return partitions
+
+def load_partitions(name, league_ids=None, seasons=None, data_dir="data"):
+    """
+        Loads and concatenates the <name>_updated.csv table (players, clubs, games or appearances) of all
+        partitions matching league_ids and seasons. None selects all leagues or all seasons.
+    """
+    frames = []
+    for league_id, season in list_partitions(data_dir):
+        if league_ids is not None and league_id not in league_ids:
+            continue
+        if seasons is not None and season not in [int(s) for s in seasons]:
+            continue
+        path = os.path.join(partition_dir(league_id, season, data_dir), f"{name}_updated.csv")
+        if os.path.exists(path):
+            frames.append(load_table(path))
+    if len(frames) == 0:
+        raise FileNotFoundError(f"no partitions of {name} found for leagues {league_ids} and seasons {seasons}")
+    return pd.concat(frames, ignore_index=True)
+
+def combine_player_seasons(players):
+    """
+        Combines the rows of each player loaded from partitions of several seasons into one row holding the
+        totals of all seasons. The other columns are those of the player's last row, i.e. of the latest season.
+    """
+    totals = players.groupby("player_id", sort=False)[season_total_columns].sum()
+    players = players.drop_duplicates("player_id", keep="last", ignore_index=True)
+    players[season_total_columns] = totals.reindex(players["player_id"]).to_numpy()
+    return players
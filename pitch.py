@@ -1,10 +1,107 @@
-import pandas as pd
+import os
+import threading
+
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Arc
-import seaborn as sns
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
+
+# Colors of the pitch artwork
+THEMES = {
+    'classic': {'background': 'white', 'lines': 'black', 'positions': 'red', 'labels': 'black'},
+    'grass': {'background': '#3a7d44', 'lines': 'white', 'positions': '#f4d35e', 'labels': 'black'},
+    'dark': {'background': '#1e1e1e', 'lines': '#d0d0d0', 'positions': '#e4572e', 'labels': 'white'}
+}
+
+def arc_points(centre, radius, theta1, theta2, points=64):
+    """
+        Returns the points of a circular arc from theta1 to theta2 (degrees, counterclockwise)
+    """
+    if theta2 <= theta1:
+        theta2 += 360
+    angles = np.radians(np.linspace(theta1, theta2, points))
+    return np.column_stack([centre[0] + radius * np.cos(angles), centre[1] + radius * np.sin(angles)])
+
+# All pitch markings as polylines, drawn as a single LineCollection
+PITCH_LINES = [
+    #Pitch Outline & Centre Line
+    [(0, 0), (0, 90), (130, 90), (130, 0), (0, 0)],
+    [(65, 0), (65, 90)],
+    #Left Penalty Area
+    [(0, 65), (16.5, 65), (16.5, 25), (0, 25)],
+    #Right Penalty Area
+    [(130, 65), (113.5, 65), (113.5, 25), (130, 25)],
+    #Left 6-yard Box
+    [(0, 54), (5.5, 54), (5.5, 36), (0.5, 36)],
+    #Right 6-yard Box
+    [(130, 54), (124.5, 54), (124.5, 36), (130, 36)],
+    #Centre Circle & Arcs
+    arc_points((65, 45), 9.15, 0, 360),
+    arc_points((11, 45), 9.15, 310, 50),
+    arc_points((119, 45), 9.15, 130, 230)
+]
+
+# Centre and penalty spots
+PITCH_SPOTS = [(65, 45), (11, 45), (119, 45)]
+
+# Marker and label of each position
+POSITION_LABELS = {
+    'Goalkeeper': 'GK',
+    'Right-Back': 'RB', 'Centre-Back': 'CB', 'Left-Back': 'LB',
+    'Right Midfield': 'RM', 'Defensive Midfield': 'DM', 'Central Midfield': 'CM', 'Attacking Midfield': 'OM', 'Left Midfield': 'LM',
+    'Right Winger': 'RW', 'Centre-Forward': 'CF', 'Left Winger': 'LW'
+}
+
+# Rendered pitch figures per (theme, positions). They are never registered with pyplot, so nothing leaks
+# when many images are rendered, and a figure can be saved at any resolution without drawing it again.
+pitch_figures = {}
+pitch_figures_lock = threading.Lock()
+
+def render_pitch(theme='classic', positions=True):
+    """
+        Returns the cached figure of the pitch artwork in the given theme, with or without position markers
+    """
+    with pitch_figures_lock:
+        if (theme, positions) in pitch_figures:
+            return pitch_figures[(theme, positions)]
+
+        colors = THEMES[theme]
+        fig = Figure(figsize=(13, 9), facecolor=colors['background'])
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.set_facecolor(colors['background'])
+
+        # Straight lines are 1.5 wide, centre circle and arcs 1.0
+        linewidths = [1.0 if len(line) > 5 else 1.5 for line in PITCH_LINES]
+        ax.add_collection(LineCollection(PITCH_LINES, colors=colors['lines'], linewidths=linewidths))
+        ax.add_collection(PatchCollection([Circle(spot, 0.8) for spot in PITCH_SPOTS], facecolors=colors['lines'], edgecolors=colors['lines']))
+
+        if positions:
+            coordinates = [Pitch.position_coords[position] for position in POSITION_LABELS]
+            ax.add_collection(PatchCollection([Circle(xy, 3) for xy in coordinates], facecolors=colors['positions'], edgecolors=colors['positions']))
+            for (x, y), label in zip(coordinates, POSITION_LABELS.values()):
+                ax.text(x, y, label, fontsize=12, ha="center", va="center", color=colors['labels'])
+
+        #Tidy Axes
+        ax.axis('off')
+        ax.set_xlim(0, 130)
+        ax.set_ylim(0, 90)
+
+        pitch_figures[(theme, positions)] = fig
+        return fig
+
 
 class Pitch:
+    # Size of the pitch, coordinates of all positions lie within
+    width = 130
+    height = 90
+
+    position_coords = {
+        'Goalkeeper': (10,45),
+        'Right-Back': (25, 20), 'Centre-Back': (25, 45), 'Left-Back': (25, 70),
+        'Right Midfield': (65, 20), 'Defensive Midfield': (45, 45), 'Central Midfield': (65, 45), 'Attacking Midfield': (90, 45), 'Left Midfield': (65, 70),
+        'Right Winger': (100, 20), 'Second Striker': (100, 45), 'Centre-Forward': (110, 45), 'Left Winger': (100, 70)
+    }
+
     def __init__(self, players):
         self.players = players
         self.position_data = None
@@ -19,130 +116,56 @@ class Pitch:
         return (self.players.groupby('sub_position')['market_value'].max().reset_index())
 
     def convert_position_to_coordinates(self):
-        position_coords = {
-            'Goalkeeper': (10,45),
-            'Right-Back': (25, 20), 'Centre-Back': (25, 45), 'Left-Back': (25, 70),
-            'Right Midfield': (65, 20), 'Defensive Midfield': (45, 45), 'Central Midfield': (65, 45), 'Attacking Midfield': (90, 45), 'Left Midfield': (65, 70),
-            'Right Winger': (100, 20), 'Second Striker': (100, 45), 'Centre-Forward': (110, 45), 'Left Winger': (100, 70)
-        }
-        
-        self.position_data = self.position_data.dropna(subset=['sub_position'])
-
-        self.position_data['X'] = 0
-        self.position_data['Y'] = 0
-        
-        for ind, row in self.position_data.iterrows():
-            position = row['sub_position']
-            self.position_data.at[ind, 'X'] = position_coords[position][0]
-            self.position_data.at[ind, 'Y'] = position_coords[position][1]
-        return self.position_data[["X", "Y", "market_value"]]
-
-    def draw(self):
-        #Create figure
-        fig=plt.figure()
-        fig.set_size_inches(13, 9)
-        ax=fig.add_subplot(1,1,1)
-
-        #Pitch Outline & Centre Line
-        plt.plot([0,0],[0,90], color="black")
-        plt.plot([0,130],[90,90], color="black")
-        plt.plot([130,130],[90,0], color="black")
-        plt.plot([130,0],[0,0], color="black")
-        plt.plot([65,65],[0,90], color="black")
-
-        #Left Penalty Area
-        plt.plot([16.5,16.5],[65,25],color="black")
-        plt.plot([0,16.5],[65,65],color="black")
-        plt.plot([16.5,0],[25,25],color="black")
-
-        #Right Penalty Area
-        plt.plot([130,113.5],[65,65],color="black")
-        plt.plot([113.5,113.5],[65,25],color="black")
-        plt.plot([113.5,130],[25,25],color="black")
-
-        #Left 6-yard Box
-        plt.plot([0,5.5],[54,54],color="black")
-        plt.plot([5.5,5.5],[54,36],color="black")
-        plt.plot([5.5,0.5],[36,36],color="black")
-
-        #Right 6-yard Box
-        plt.plot([130,124.5],[54,54],color="black")
-        plt.plot([124.5,124.5],[54,36],color="black")
-        plt.plot([124.5,130],[36,36],color="black")
-
-        #Prepare Circles
-        centreCircle = plt.Circle((65,45),9.15,color="black",fill=False)
-        centreSpot = plt.Circle((65,45),0.8,color="black")
-        leftPenSpot = plt.Circle((11,45),0.8,color="black")
-        rightPenSpot = plt.Circle((119,45),0.8,color="black")
-
-        #Draw Circles
-        ax.add_patch(centreCircle)
-        ax.add_patch(centreSpot)
-        ax.add_patch(leftPenSpot)
-        ax.add_patch(rightPenSpot)
-
-        #Prepare Arcs
-        leftArc = Arc((11,45),height=18.3,width=18.3,angle=0,theta1=310,theta2=50,color="black")
-        rightArc = Arc((119,45),height=18.3,width=18.3,angle=0,theta1=130,theta2=230,color="black")
-
-        #Draw Arcs
-        ax.add_patch(leftArc)
-        ax.add_patch(rightArc)
-
-        #Prepare Positions
-        gk = plt.Circle((10,45), 3, color="red", fill=True)
-        lb = plt.Circle((25,20), 3, color="red", fill=True)
-        cb = plt.Circle((25,45), 3, color="red", fill=True)
-        rb = plt.Circle((25,70), 3, color="red", fill=True)
-        lm = plt.Circle((65,20), 3, color="red", fill=True)
-        cdm = plt.Circle((45,45), 3, color="red", fill=True)
-        cm = plt.Circle((65,45), 3, color="red", fill=True)
-        cam = plt.Circle((90,45), 3, color="red", fill=True)
-        rm = plt.Circle((65,70), 3, color="red", fill=True)
-        lw = plt.Circle((100,20), 3, color="red", fill=True)
-        cf = plt.Circle((110,45), 3, color="red", fill=True)
-        rw = plt.Circle((100,70), 3, color="red", fill=True)
-
-
-        #Draw Positions
-        ax.add_patch(gk)
-        ax.add_patch(lb)
-        ax.add_patch(cb)
-        ax.add_patch(rb)
-        ax.add_patch(lm)
-        ax.add_patch(cdm)
-        ax.add_patch(cm)
-        ax.add_patch(cam)
-        ax.add_patch(rm)
-        ax.add_patch(lw)
-        ax.add_patch(cf)
-        ax.add_patch(rw)
-
-        #Add Annotations
-        ax.annotate("GK", xy=(10, 45), fontsize=12, ha="center", va="center")
-        ax.annotate("RB", xy=(25, 20), fontsize=12, ha="center", va="center")
-        ax.annotate("CB", xy=(25, 45), fontsize=12, ha="center", va="center")
-        ax.annotate("LB", xy=(25, 70), fontsize=12, ha="center", va="center")
-        ax.annotate("RM", xy=(65, 20), fontsize=12, ha="center", va="center")
-        ax.annotate("DM", xy=(45, 45), fontsize=12, ha="center", va="center")
-        ax.annotate("CM", xy=(65, 45), fontsize=12, ha="center", va="center")
-        ax.annotate("OM", xy=(90, 45), fontsize=12, ha="center", va="center")
-        ax.annotate("LM", xy=(65, 70), fontsize=12, ha="center", va="center")
-        ax.annotate("RW", xy=(100, 20), fontsize=12, ha="center", va="center")
-        ax.annotate("CF", xy=(110, 45), fontsize=12, ha="center", va="center")
-        ax.annotate("LW", xy=(100, 70), fontsize=12, ha="center", va="center")
+        position_x = {position: x for position, (x, _) in self.position_coords.items()}
+        position_y = {position: y for position, (_, y) in self.position_coords.items()}
 
+        # Unknown positions cannot be placed on the pitch
+        self.position_data = self.position_data[self.position_data['sub_position'].isin(position_x.keys())].copy()
 
-        #Tidy Axes
-        plt.axis('off')
-
-        plt.ylim(0, 90)
-        plt.xlim(0, 130)
-
-        # Remove Space around Pitch
-        plt.subplots_adjust(left=0.0, right=1.0, bottom=0.0, top=1.0)
-
-        plt.savefig('pitch.jpg')
-
+        self.position_data['X'] = self.position_data['sub_position'].map(position_x)
+        self.position_data['Y'] = self.position_data['sub_position'].map(position_y)
+        return self.position_data[["X", "Y", "market_value"]]
 
+    def density_grid(self, bandwidth=8, cell=5):
+        """
+            Smooths the market values of position_data (columns X, Y and market_value) over the pitch with a
+            Gaussian kernel of standard deviation bandwidth around each position, sampled every cell units.
+            Returns the cell centres along x (26) and y (18) and the grid of smoothed market values (18 x 26).
+        """
+        x = np.arange(0, self.width, cell) + cell / 2
+        y = np.arange(0, self.height, cell) + cell / 2
+        positions_x = self.position_data["X"].to_numpy(dtype=float)
+        positions_y = self.position_data["Y"].to_numpy(dtype=float)
+        market_values = np.nan_to_num(self.position_data["market_value"].to_numpy(dtype=float))
+
+        # The kernel is separable, so the grid is the product of one kernel along x and one along y per position
+        kernel_x = np.exp(-(x[np.newaxis, :] - positions_x[:, np.newaxis]) ** 2 / (2 * bandwidth ** 2))
+        kernel_y = np.exp(-(y[np.newaxis, :] - positions_y[:, np.newaxis]) ** 2 / (2 * bandwidth ** 2))
+        grid = np.einsum("p,py,px->yx", market_values, kernel_y, kernel_x)
+        return x, y, grid
+
+    def draw(self, path='pitch.jpg', theme='classic', dpi=100, positions=True):
+        """
+            Saves the pitch artwork to path, the format follows from the file extension (jpg, png, svg, pdf, ...).
+            At the default 100 dpi the image is 1300 x 900 pixels.
+        """
+        fig = render_pitch(theme, positions)
+        with pitch_figures_lock:
+            fig.savefig(path, dpi=dpi, facecolor=fig.get_facecolor())
+        return path
+
+    def export(self, directory, name='pitch', formats=('png', 'svg'), dpis=(50, 100, 200), themes=('classic',), positions=True):
+        """
+            Saves the pitch artwork for every theme in every format to directory, raster formats once per dpi
+            (e.g. pitch_classic_100.png), vector formats once (pitch_classic.svg). Returns the written paths.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for theme in themes:
+            for extension in formats:
+                if extension in ('svg', 'pdf', 'eps'):
+                    paths.append(self.draw(os.path.join(directory, f"{name}_{theme}.{extension}"), theme, positions=positions))
+                    continue
+                for dpi in dpis:
+                    paths.append(self.draw(os.path.join(directory, f"{name}_{theme}_{dpi}.{extension}"), theme, dpi, positions))
+        return paths
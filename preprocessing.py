@@ -1,258 +1,621 @@
-import requests
+import argparse
+import os
+import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
-from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-
-# Read in data
-players = pd.read_csv("data/players.csv")
-clubs = pd.read_csv("data/clubs.csv")
-appearances = pd.read_csv("data/appearances.csv")
-games = pd.read_csv("data/games.csv")
+from cache import MarketValueCheckpoint, ResponseCache
+from columnar import write_table
+from fingerprints import InputFingerprints, diff_rows, file_digest, row_hashes
+from partitions import partition_dir
+from scraper import MarketValueScraper
 
 # Create list of top league ids
 top_league_ids = ["GB1", "ES1", "L1", "IT1", "FR1"]
 
-# Filter on top leagues (England, Spain, Germany, Italy, France)
-# Add column league_id, initialize with None
-players["league_id"] = None
-for ind, row in players.iterrows():
-    club_id = row["club_id"]
-    # Use club_id to find the league_id from clubs dataframe
-    mask = clubs['club_id'] == club_id
-    club = clubs[mask].reset_index()
-    try:
-        league_id = club["league_id"][0]
-    except:
-        pass
-    players.at[ind, "league_id"] = league_id
-
-players = players[players["league_id"].isin(top_league_ids)]
-clubs = clubs[clubs["league_id"].isin(top_league_ids)]
-appearances = appearances[appearances["league_id"].isin(top_league_ids)]
-games = games[games["league_code"].isin(top_league_ids)]
-
-###############
-### players ###
-###############
-
-# Add column market_value, initialize with 0
-players["market_value"] = 0
-
-# Fix headers
-headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/47.0.2526.106 Safari/537.36'}
-
-# Scrape market_value from transfermarkt.de
-for ind, row in tqdm(players.iterrows()):
-    try:
-        url = row["url"]
-        request_response = requests.get(url, headers=headers)
-        
-        # Parse request_response into beautifulsoup object
-        html_content = BeautifulSoup(request_response.content, 'html.parser')
-        
-        # The find_all () method is able to return all tags that meet restrictions within parentheses
-        market_value_html = html_content.find_all("div", {"class": "dataMarktwert"})[0]
-
-        market_value = market_value_html.text.split("£")[1].split(" ")[0].strip('\t\r\n')
-
-        if market_value.endswith("m"):
-            market_value = float(market_value.split("m")[0]) * 1000000
-        else:
-            market_value = float(market_value.split("Th.")[0]) * 1000
-        
-        players.at[ind, "market_value"] = market_value
-        
-    except:
-        pass
-
-# Feature Engineering: Initialize new columns
-players["games"] = 0
-players["minutes_played"] = 0
-players["goals"] = 0
-players["assists"] = 0
-players["wins"] = 0
-players["draws"] = 0
-players["losses"] = 0
-players["yellow_cards"] = 0
-players["red_cards"] = 0
-players["age"] = None
-
-# current_date will be chosen as the production date of data  
-current_date = "2021-06-08"
-current_date = datetime.strptime(current_date, "%Y-%m-%d")
-
-def calc_age(date_of_birth, current_date):
-    """
-        Calculates the age based on birth date and current date
-    """
-    try:
-        date_of_birth = datetime.strptime(date_of_birth, "%Y-%m-%d")
-    except:
+# Inputs of the pipeline, each one is written back as <name>_updated.csv
+input_names = ["players", "clubs", "appearances", "games"]
+
+# Columns identifying a row of each input and the id columns needed to tell which outputs a changed row affects
+fingerprint_keys = {"players": ["player_id"], "clubs": ["club_id"], "appearances": ["game_id", "player_id"], "games": ["game_id"]}
+fingerprint_columns = {
+    "players": ["player_id", "club_id"],
+    "clubs": ["club_id"],
+    "appearances": ["game_id", "player_id", "player_club_id"],
+    "games": ["game_id", "home_club_id", "away_club_id"]
+}
+
+# Season totals summed up from the appearances of each player
+player_stat_columns = ["minutes_played", "goals", "assists", "yellow_cards", "red_cards"]
+
+def add_league_ids(players, clubs):
+    """
+        Adds column league_id to players by mapping each club_id to the league_id of the club
+    """
+    players["league_id"] = players["club_id"].map(clubs.set_index("club_id")["league_id"])
+    return players
+
+def calc_ages(dates_of_birth, current_date):
+    """
+        Calculates the age for a series of birth dates (YYYY-MM-DD) based on current date.
+        Missing or malformed birth dates result in a missing age.
+    """
+    dates_of_birth = pd.to_datetime(dates_of_birth, format="%Y-%m-%d", errors="coerce")
+    birthday_ahead = (dates_of_birth.dt.month > current_date.month) | \
+        ((dates_of_birth.dt.month == current_date.month) & (dates_of_birth.dt.day > current_date.day))
+    ages = current_date.year - dates_of_birth.dt.year - birthday_ahead
+    return ages.astype("Int64")
+
+def calc_player_totals(appearances):
+    """
+        Sums up games, minutes played, goals, assists, yellow and red cards for each player during the season
+    """
+    aggregations = {"games": ("game_id", "count")}
+    aggregations.update({column: (column, "sum") for column in player_stat_columns})
+    return appearances.groupby("player_id").agg(**aggregations)
+
+def enrich_players(players, clubs, player_totals, current_date):
+    """
+        Adds the season totals (see calc_player_totals), age and club_name columns to players using keyed joins
+        instead of row lookups. Players without any appearance get 0 for all totals. wins, draws and losses are
+        initialized with 0.
+    """
+    totals = player_totals.reindex(players["player_id"]).fillna(0).astype(int)
+
+    # Keep the column order of players_updated.csv
+    for column in ["games", "minutes_played", "goals", "assists", "wins", "draws", "losses", "yellow_cards", "red_cards"]:
+        players[column] = totals[column].to_numpy() if column in totals else 0
+    players["age"] = calc_ages(players["date_of_birth"], current_date)
+
+    # Fill sub_position column for Goalkeepers
+    players.loc[players['position'] == "Goalkeeper", "sub_position"] = "Goalkeeper"
+
+    # Add and fill club_name column
+    players["club_name"] = players["club_id"].map(clubs.set_index("club_id")["pretty_name"])
+    return players
+
+def calc_club_results(games):
+    """
+        Derives the outcome of each game for both participating clubs.
+        Returns one row per game and club with the columns game_id, club_id and result (win, draw or loss)
+    """
+    goal_difference = games["home_club_goals"].to_numpy() - games["away_club_goals"].to_numpy()
+    home_won = goal_difference > 0
+    away_won = goal_difference < 0
+
+    home_results = pd.DataFrame({
+        "game_id": games["game_id"].to_numpy(),
+        "club_id": games["home_club_id"].to_numpy(),
+        "result": np.select([home_won, away_won], ["win", "loss"], "draw")
+    })
+    away_results = pd.DataFrame({
+        "game_id": games["game_id"].to_numpy(),
+        "club_id": games["away_club_id"].to_numpy(),
+        "result": np.select([home_won, away_won], ["loss", "win"], "draw")
+    })
+    return pd.concat([home_results, away_results], ignore_index=True)
+
+def calc_player_results(appearances, games):
+    """
+        Counts wins, draws and losses for each player with a single join of appearances and club results on
+        game_id and player_club_id.
+        Returns the counts indexed by player_id and a dataframe of the appearances that could not be matched,
+        either because the game is unknown or because player_club_id played neither side of the game
+    """
+    club_results = calc_club_results(games)
+    appearance_results = appearances[["player_id", "game_id", "player_club_id"]].merge(
+        club_results,
+        how="left",
+        left_on=["game_id", "player_club_id"],
+        right_on=["game_id", "club_id"]
+    )
+    matched = appearance_results["result"].notna()
+
+    player_results = appearance_results[matched] \
+        .groupby(["player_id", "result"]).size() \
+        .unstack(fill_value=0) \
+        .reindex(columns=["win", "draw", "loss"], fill_value=0) \
+        .rename(columns={"win": "wins", "draw": "draws", "loss": "losses"}) \
+        .rename_axis(columns=None)
+
+    unmatched_appearances = appearance_results.loc[~matched, ["player_id", "game_id", "player_club_id"]].merge(
+        games[["game_id", "home_club_id", "away_club_id"]],
+        how="left",
+        on="game_id"
+    )
+    unmatched_appearances["reason"] = np.where(
+        unmatched_appearances["home_club_id"].isna(),
+        "unknown game",
+        "club played neither side"
+    )
+    return player_results, unmatched_appearances
+
+def calc_club_market_values(clubs, players):
+    """
+        Adds column market_value to clubs, the sum of the market values of all players of a club.
+        Clubs without players get a market value of 0.
+    """
+    # Sum up market values for each team, market values are whole euros
+    market_values_clubs = players.groupby("club_id")["market_value"].sum()
+    clubs["market_value"] = clubs["club_id"].map(market_values_clubs).fillna(0).round().astype("int64")
+    return clubs
+
+def calc_weighted_market_values(appearances, players):
+    """
+        Adds column weighted_market_value to appearances, the market value of the player weighted by minutes played.
+        Appearances of players without a known market value get a weighted market value of 0.
+    """
+    # Depending on how many minutes a player is on the pitch we can calculate a weighted market value for each team appearance
+    # For instance if a player is on the pitch the whole game (90 minutes) his weighted market value will be the same as his
+    # general market value. If on the other hand the player only plays 45 minutes his weighted market value will only be half
+    # of his general market value for this particular appearance. This way we can calculate a weighted market value for each team
+    # in a match.
+    player_market_values = appearances["player_id"].map(players.set_index("player_id")["market_value"]).fillna(0).to_numpy(dtype=float)
+    appearances["weighted_market_value"] = player_market_values * (appearances["minutes_played"].to_numpy() / 90)
+    return appearances
+
+def add_club_names(games, clubs):
+    """
+        Adds columns home_club_name and away_club_name to games
+    """
+    pretty_names = clubs.set_index("club_id")["pretty_name"]
+    games["home_club_name"] = games["home_club_id"].map(pretty_names)
+    games["away_club_name"] = games["away_club_id"].map(pretty_names)
+    return games
+
+def add_game_market_values(games, clubs):
+    """
+        Adds columns market_value_home and market_value_away to games using the market value of each club
+    """
+    market_values_clubs = clubs.set_index("club_id")["market_value"]
+    games["market_value_home"] = games["home_club_id"].map(market_values_clubs)
+    games["market_value_away"] = games["away_club_id"].map(market_values_clubs)
+    return games
+
+def calc_club_weighted_market_values(appearances):
+    """
+        Sums up the weighted market values of all appearances for each game and club.
+        Returns a series indexed by game_id and player_club_id
+    """
+    return appearances.groupby(["game_id", "player_club_id"])["weighted_market_value"].sum()
+
+def add_game_weighted_market_values(games, club_weighted_market_values):
+    """
+        Adds columns weighted_market_value_home and weighted_market_value_away to games, the sum of the weighted
+        market values of all appearances of each side (see calc_club_weighted_market_values).
+        A side without any recorded appearance gets a weighted market value of 0.
+    """
+    for side in ["home", "away"]:
+        keys = pd.MultiIndex.from_arrays([games["game_id"], games[f"{side}_club_id"]])
+        weighted_market_values = club_weighted_market_values.reindex(keys)
+
+        missing = weighted_market_values.isna().sum()
+        if missing > 0:
+            print(f"{missing} games have no recorded appearances for the {side} side, using a weighted market value of 0")
+        games[f"weighted_market_value_{side}"] = weighted_market_values.fillna(0).to_numpy(dtype=float)
+    return games
+
+def summarize_appearances(appearances, games):
+    """
+        Aggregates appearances with a weighted_market_value into per player totals and results and per game
+        and club weighted market values
+    """
+    player_results, unmatched_appearances = calc_player_results(appearances, games)
+    return {
+        "player_totals": calc_player_totals(appearances),
+        "player_results": player_results,
+        "unmatched_appearances": unmatched_appearances,
+        "club_weighted_market_values": calc_club_weighted_market_values(appearances)
+    }
+
+def combine_summaries(summary, other):
+    """
+        Combines the summaries of two disjoint sets of appearances, e.g. two chunks of appearances.csv
+    """
+    return {
+        "player_totals": summary["player_totals"].add(other["player_totals"], fill_value=0),
+        "player_results": summary["player_results"].add(other["player_results"], fill_value=0),
+        "unmatched_appearances": pd.concat([summary["unmatched_appearances"], other["unmatched_appearances"]], ignore_index=True),
+        "club_weighted_market_values": summary["club_weighted_market_values"].add(other["club_weighted_market_values"], fill_value=0)
+    }
+
+def load_inputs(data_dir="data", with_appearances=True, league_ids=top_league_ids, seasons=None):
+    """
+        Reads players, clubs, appearances and games and keeps the given leagues and seasons only.
+        seasons=None keeps all seasons. Without appearances the returned dictionary has no "appearances" entry.
+    """
+    # Read in data
+    players = pd.read_csv(os.path.join(data_dir, "players.csv"))
+    clubs = pd.read_csv(os.path.join(data_dir, "clubs.csv"))
+    games = pd.read_csv(os.path.join(data_dir, "games.csv"))
+
+    # Filter on leagues, by default the top leagues (England, Spain, Germany, Italy, France)
+    players = add_league_ids(players, clubs)
+
+    players = players[players["league_id"].isin(league_ids)].copy()
+    clubs = clubs[clubs["league_id"].isin(league_ids)].copy()
+    games = games[games["league_code"].isin(league_ids)].copy()
+    if seasons is not None:
+        games = games[games["season"].isin(seasons)].copy()
+    inputs = {"players": players, "clubs": clubs, "games": games}
+
+    if with_appearances:
+        appearances = pd.read_csv(os.path.join(data_dir, "appearances.csv"))
+        inputs["appearances"] = filter_appearances(appearances, games, league_ids, seasons)
+    return inputs
+
+def filter_appearances(appearances, games, league_ids=top_league_ids, seasons=None):
+    """
+        Keeps the appearances in the given leagues and, unless seasons is None, in the given games
+    """
+    keep = appearances["league_id"].isin(league_ids)
+    if seasons is not None:
+        keep &= appearances["game_id"].isin(games["game_id"])
+    return appearances[keep].copy()
+
+def create_scraper(data_dir="data"):
+    """
+        Creates the market value scraper. Fetched pages are cached and every scraped value is checkpointed,
+        so an interrupted run resumes where it stopped
+    """
+    cache_dir = os.path.join(data_dir, "cache")
+    return MarketValueScraper(
+        cache=ResponseCache(os.path.join(cache_dir, "pages")),
+        checkpoint=MarketValueCheckpoint(os.path.join(cache_dir, "market_values.csv"))
+    )
+
+def scrape_market_values(players, scraper, data_dir="data"):
+    """
+        Scrapes market_value from transfermarkt.co.uk, players that could not be scraped get a market value of 0
+    """
+    market_values, scrape_report = scraper.scrape(players.set_index("player_id")["url"])
+
+    print(f"Scraping market values: {scrape_report}")
+    if len(scrape_report.failures) > 0:
+        scrape_report.to_frame().to_csv(os.path.join(data_dir, "scrape_failures.csv"), index=False)
+    return market_values.fillna(0).to_numpy()
+
+def report_unmatched_appearances(unmatched_appearances, data_dir="data"):
+    """
+        Keeps appearances whose club played neither side of the game for inspection
+    """
+    if len(unmatched_appearances) > 0:
+        path = os.path.join(data_dir, "appearances_unmatched.csv")
+        print(f"{len(unmatched_appearances)} appearances could not be matched to a game result, see {path}")
+        unmatched_appearances.to_csv(path, index=False)
+
+def build_players(players, clubs, summary, current_date, data_dir="data"):
+    """
+        Fills season totals, results, age, sub_position and club_name of players from the summary of their
+        appearances (see summarize_appearances)
+    """
+    players = enrich_players(players, clubs, summary["player_totals"], current_date)
+
+    # Wins, draws and losses of each player come from joining appearances to the outcome of each game
+    players[["wins", "draws", "losses"]] = summary["player_results"].reindex(players["player_id"]).fillna(0).astype(int).to_numpy()
+    report_unmatched_appearances(summary["unmatched_appearances"], data_dir)
+    return players
+
+def build_games(games, clubs, club_weighted_market_values):
+    """
+        Adds club names, market values and weighted market values of both sides to games
+    """
+    games = add_club_names(games, clubs)
+    games = add_game_market_values(games, clubs)
+    games = add_game_weighted_market_values(games, club_weighted_market_values)
+    return games
+
+def read_outputs(data_dir="data"):
+    """
+        Reads the *_updated.csv outputs of a previous run, returns None if any of them is missing
+    """
+    paths = {name: os.path.join(data_dir, f"{name}_updated.csv") for name in input_names}
+    if not all(os.path.exists(path) for path in paths.values()):
         return None
-    return current_date.year - date_of_birth.year - ((current_date.month, current_date.day) < (date_of_birth.month, date_of_birth.day))
-
-# Fill column age
-for ind, row in players.iterrows():
-    age = calc_age(row["date_of_birth"], current_date)
-    players.at[ind, "age"] = age
-
-# Fill sub_position column for Goalkeepers
-players.loc[players['position'] == "Goalkeeper", "sub_position"] = "Goalkeeper"
-
-# Add and fill club_name column 
-players["club_name"] = None
-for ind, row in players.iterrows():
-    pretty_name = clubs.loc[clubs["club_id"] == row["club_id"], "pretty_name"].item()
-    players.at[ind, "club_name"] = pretty_name
-
-# Create grouped dataframe object to get sum of minutes played, goals scored, assists provied, yellow and red cards received
-# for each player during the season
-player_stats = appearances[["player_id", "minutes_played", "goals", "assists", "yellow_cards", "red_cards"]].groupby("player_id").sum()
-
-# Create grouped dataframe object to get the number of games for each player during the season
-game_stats = appearances[["player_id", "game_id"]].groupby("player_id").count()
-
-# Fill those columns 
-for ind, row in players.iterrows():
-    player_id = row["player_id"]
-    try:
-        players.at[ind, "minutes_played"] = player_stats.loc[player_id]["minutes_played"]
-        players.at[ind, "goals"] = player_stats.loc[player_id]["goals"]
-        players.at[ind, "assists"] = player_stats.loc[player_id]["assists"]
-        players.at[ind, "yellow_cards"] = player_stats.loc[player_id]["yellow_cards"]
-        players.at[ind, "red_cards"] = player_stats.loc[player_id]["red_cards"]
-        players.at[ind, "games"] = game_stats.loc[player_id]["game_id"]
-    except:
-        pass
-
-# Create grouped dataframe object to get a list of every game appearance for each player
-player_games = appearances[["player_id", "game_id", "player_club_id"]] \
-        .groupby(["player_id", "player_club_id"])["game_id"] \
-        .apply(list).reset_index(name='games') 
-
-# Create a dictionary containing information about each players game outcomes if they played at least 1 minute in that game
-results_dict = {}
-for ind, row in player_games.iterrows():
-    player_id = row["player_id"]
-    results_dict[player_id] = {"wins": 0, "draws": 0, "losses": 0}
-    for game_played in row["games"]:
-        mask = games['game_id'] == game_played
-        game = games[mask]
-
-        home_goals = int(game["home_club_goals"])
-        away_goals = int(game["away_club_goals"])
-
-        if home_goals > away_goals:
-            result = "home"
-        elif home_goals < away_goals:
-            result = "away"
-        else:
-            result = "draw"
-        
-        if row["player_club_id"] == int(game["home_club_id"]):
-            if result == "home":
-                results_dict[player_id]["wins"] += 1
-            elif result == "away":
-                results_dict[player_id]["losses"] += 1
-            else:
-                results_dict[player_id]["draws"] += 1
-        elif row["player_club_id"] == int(game["away_club_id"]):
-            if result == "home":
-                results_dict[player_id]["losses"] += 1
-            elif result == "away":
-                results_dict[player_id]["wins"] += 1
-            else:
-                results_dict[player_id]["draws"] += 1
-        else:
-            print(f"player_club_id: {row['player_club_id']}\nhome_club_id: {game['home_club_id']}\naway_club_id: {game['away_club_id']}")
-
-# Fill all columns using the results_dict
-for ind, row in players.iterrows():
-    player_id = row["player_id"]
-    try:
-        players.at[ind, "wins"] = results_dict[player_id]["wins"]
-        players.at[ind, "draws"] = results_dict[player_id]["draws"]
-        players.at[ind, "losses"] = results_dict[player_id]["losses"]
-    except:
-        pass
-
-#############
-### clubs ###
-#############
-
-# Sum up market values for each team
-market_values_clubs = players[["club_id", "market_value"]].groupby(["club_id"], as_index=False).sum()
-
-# Create dictionary {club_id: market_value}
-market_values_clubs_dict = dict(zip(market_values_clubs["club_id"], market_values_clubs["market_value"]))
-
-# Add column market_value, initialize with 0
-clubs["market_value"] = 0
-for ind, row in clubs.iterrows():
-    club_id = row["club_id"]
-    clubs.at[ind, "market_value"] = market_values_clubs_dict[club_id]
-
-###################
-### appearances ###
-###################
-
-# Create dictionary {player_id: market_value}
-market_values_players_dict = dict(zip(players["player_id"], players["market_value"]))
-
-# Add column weighted_market_value, initialize with 0
-appearances["weighted_market_value"] = 0 
-
-# Depending on how many minutes a player is on the pitch we can calculate a weighted market value for each team appearance
-# For instance if a player is on the pitch the whole game (90 minutes) his weighted market value will be the same as his 
-# general market value. If on the other hand the player only plays 45 minutes his weighted market value will only be half
-# of his general market value for this particular appearance. This way we can calculate a weighted market value for each team
-# in a match. 
-for ind, row in appearances.iterrows():
-    player_market_value = market_values_players_dict[row["player_id"]]
-    player_weighted_market_value = player_market_value * (row["minutes_played"]/90)
-    appearances.at[ind, "weighted_market_value"] = player_weighted_market_value
-
-#############
-### games ###
-#############
-
-# Add and fill home_club_name and away_club_name columns
-games["home_club_name"] = None
-games["away_club_name"] = None
-for ind, row in games.iterrows():
-    home_pretty_name = clubs.loc[clubs["club_id"] == row["home_club_id"], "pretty_name"].item()
-    away_pretty_name = clubs.loc[clubs["club_id"] == row["away_club_id"], "pretty_name"].item()
-
-    games.at[ind, "home_club_name"] = home_pretty_name
-    games.at[ind, "away_club_name"] = away_pretty_name
-
-# Add columns market_value_home and market_value_away, initialize with 0
-games["market_value_home"] = 0
-games["market_value_away"] = 0
-for ind, row in games.iterrows():
-    home_club_id = row["home_club_id"]
-    away_club_id = row["away_club_id"]
-    games.at[ind, "market_value_home"] = market_values_clubs_dict[home_club_id]
-    games.at[ind, "market_value_away"] = market_values_clubs_dict[away_club_id]
-
-# Create a grouped dataframe object to get the weighted market value for each player and each game
-appearances_weighted_market_value = appearances[["game_id", "player_club_id", "weighted_market_value"]].groupby(["game_id", "player_club_id"], as_index=False).sum()
-
-# Add columns weighted_market_value_home and weighted_market_value_away, initialize with 0
-games["weighted_market_value_home"] = 0
-games["weighted_market_value_away"] = 0
-for ind, row in games.iterrows():
-    # For each game find all players individual weighted market value 
-    weighted_market_values = appearances_weighted_market_value[appearances_weighted_market_value["game_id"] == row["game_id"]][["player_club_id", "weighted_market_value"]]
-    weighted_market_values_dict = dict(zip(weighted_market_values["player_club_id"], weighted_market_values["weighted_market_value"]))
-    home_club_id = row["home_club_id"]
-    away_club_id = row["away_club_id"]
-    games.at[ind, "weighted_market_value_home"] = weighted_market_values_dict[home_club_id]
-    games.at[ind, "weighted_market_value_away"] = weighted_market_values_dict[away_club_id]
-
-# Create CSV files 
-players.to_csv("data/players_updated.csv", index=False)
-clubs.to_csv("data/clubs_updated.csv", index=False)
-games.to_csv("data/games_updated.csv", index=False)
-appearances.to_csv("data/appearances_updated.csv", index=False)
\ No newline at end of file
+    return {
+        name: pd.read_csv(path, dtype={"age": "Int64"} if name == "players" else None, float_precision="round_trip")
+        for name, path in paths.items()
+    }
+
+def write_outputs(outputs, data_dir="data"):
+    # Create CSV files together with a columnar copy that loads without parsing
+    for name, output in outputs.items():
+        write_table(output, os.path.join(data_dir, f"{name}_updated.csv"))
+
+def input_digests(data_dir="data", league_ids=top_league_ids, seasons=None):
+    digests = {name: file_digest(os.path.join(data_dir, f"{name}.csv")) for name in input_names}
+    # A different selection of the same files has to be processed again as well
+    digests["selection"] = {"league_ids": sorted(league_ids), "seasons": None if seasons is None else sorted(seasons)}
+    return digests
+
+def input_row_hashes(inputs):
+    return {name: row_hashes(inputs[name], fingerprint_columns[name]) for name in input_names}
+
+def merge_rows(previous, updated, current, key):
+    """
+        Replaces the rows of a previous output with the updated rows.
+        Rows that are no longer part of current are dropped and the result is ordered like current.
+    """
+    combined = pd.concat([previous[~previous.set_index(key).index.isin(updated.set_index(key).index)], updated])
+    return current[key].merge(combined, on=key, how="left")[previous.columns]
+
+def run_full(current_date, data_dir="data", state_dir="data/state", league_ids=top_league_ids, seasons=None):
+    """
+        Runs the whole pipeline and stores the input fingerprints for later incremental runs
+    """
+    digests = input_digests(data_dir, league_ids, seasons)
+    inputs = load_inputs(data_dir, league_ids=league_ids, seasons=seasons)
+    rows = input_row_hashes(inputs)
+    players, clubs, appearances, games = (inputs[name] for name in input_names)
+
+    ###############
+    ### players ###
+    ###############
+
+    scraper = create_scraper(data_dir)
+    players["market_value"] = scrape_market_values(players, scraper, data_dir)
+    scraper.checkpoint.close()
+
+    ###################
+    ### appearances ###
+    ###################
+
+    appearances = calc_weighted_market_values(appearances, players)
+    summary = summarize_appearances(appearances, games)
+
+    players = build_players(players, clubs, summary, current_date, data_dir)
+
+    #############
+    ### clubs ###
+    #############
+
+    clubs = calc_club_market_values(clubs, players)
+
+    #############
+    ### games ###
+    #############
+
+    games = build_games(games, clubs, summary["club_weighted_market_values"])
+
+    write_outputs({"players": players, "clubs": clubs, "appearances": appearances, "games": games}, data_dir)
+    InputFingerprints(state_dir).save(digests, rows)
+
+def run_streaming(current_date, chunksize, data_dir="data", state_dir="data/state", league_ids=top_league_ids, seasons=None):
+    """
+        Runs the whole pipeline but reads appearances.csv in chunks of chunksize rows. Each chunk is written to
+        appearances_updated.csv right away and only running per player and per game and club totals are kept,
+        so memory is bounded by the chunk size instead of the size of appearances.csv.
+        Input fingerprints are cleared, the next incremental run falls back to a full run.
+    """
+    inputs = load_inputs(data_dir, with_appearances=False, league_ids=league_ids, seasons=seasons)
+    players, clubs, games = inputs["players"], inputs["clubs"], inputs["games"]
+
+    ###############
+    ### players ###
+    ###############
+
+    scraper = create_scraper(data_dir)
+    players["market_value"] = scrape_market_values(players, scraper, data_dir)
+    scraper.checkpoint.close()
+
+    ###################
+    ### appearances ###
+    ###################
+
+    summary = None
+    appearances_path = os.path.join(data_dir, "appearances_updated.csv")
+    chunks = pd.read_csv(os.path.join(data_dir, "appearances.csv"), chunksize=chunksize)
+    for position, chunk in enumerate(chunks):
+        chunk = calc_weighted_market_values(filter_appearances(chunk, games, league_ids, seasons), players)
+        chunk.to_csv(appearances_path, mode="w" if position == 0 else "a", header=position == 0, index=False)
+
+        chunk_summary = summarize_appearances(chunk, games)
+        summary = chunk_summary if summary is None else combine_summaries(summary, chunk_summary)
+
+    players = build_players(players, clubs, summary, current_date, data_dir)
+
+    #############
+    ### clubs ###
+    #############
+
+    clubs = calc_club_market_values(clubs, players)
+
+    #############
+    ### games ###
+    #############
+
+    games = build_games(games, clubs, summary["club_weighted_market_values"])
+
+    write_outputs({"players": players, "clubs": clubs, "games": games}, data_dir)
+    InputFingerprints(state_dir).clear()
+
+def run_incremental(current_date, data_dir="data", state_dir="data/state", league_ids=top_league_ids, seasons=None):
+    """
+        Updates the outputs of a previous run with the new, changed and removed input rows only.
+        Only new or changed players are scraped, everybody else keeps the market value of the previous run.
+        Falls back to a full run if there is no previous run.
+    """
+    fingerprints = InputFingerprints(state_dir)
+    digests = input_digests(data_dir, league_ids, seasons)
+    previous_digests = fingerprints.load_digests()
+    previous = read_outputs(data_dir)
+    if previous_digests is None or previous is None:
+        print("No previous run found, running the full pipeline")
+        return run_full(current_date, data_dir, state_dir, league_ids, seasons)
+    if previous_digests == digests:
+        print("Inputs unchanged, nothing to update")
+        return
+
+    inputs = load_inputs(data_dir, league_ids=league_ids, seasons=seasons)
+    players, clubs, appearances, games = (inputs[name] for name in input_names)
+    rows = input_row_hashes(inputs)
+    changes = {name: diff_rows(rows[name], fingerprints.load_rows(name), fingerprint_keys[name]) for name in input_names}
+    changed_players, outdated_players = changes["players"]
+    changed_clubs, outdated_clubs = changes["clubs"]
+    changed_games, outdated_games = changes["games"]
+    changed_appearances, outdated_appearances = changes["appearances"]
+    print(", ".join(f"{len(changes[name][0])} new or changed {name}" for name in input_names))
+
+    # A changed game result affects everybody who played in it, a renamed club all of its players
+    game_ids = set(changed_games["game_id"]) | set(outdated_games["game_id"]) \
+        | set(changed_appearances["game_id"]) | set(outdated_appearances["game_id"])
+    player_ids = set(changed_players["player_id"]) \
+        | set(changed_appearances["player_id"]) | set(outdated_appearances["player_id"]) \
+        | set(appearances.loc[appearances["game_id"].isin(game_ids), "player_id"]) \
+        | set(players.loc[players["club_id"].isin(changed_clubs["club_id"]), "player_id"])
+    # Club market values change when a player is added, removed, moved or scraped again
+    club_ids = set(changed_clubs["club_id"]) | set(changed_players["club_id"]) | set(outdated_players["club_id"])
+
+    ###############
+    ### players ###
+    ###############
+
+    players_ = players[players["player_id"].isin(player_ids)].copy()
+    players_["market_value"] = players_["player_id"].map(previous["players"].set_index("player_id")["market_value"])
+    to_scrape = players_["player_id"].isin(changed_players["player_id"]).to_numpy()
+    if to_scrape.any():
+        scraper = create_scraper(data_dir)
+        players_.loc[to_scrape, "market_value"] = scrape_market_values(players_[to_scrape], scraper, data_dir)
+        scraper.checkpoint.close()
+
+    appearances_ = calc_weighted_market_values(appearances[appearances["player_id"].isin(player_ids)].copy(), players_)
+    games_ = games[games["game_id"].isin(appearances_["game_id"])]
+    players_ = build_players(players_, clubs, summarize_appearances(appearances_, games_), current_date, data_dir)
+    players = merge_rows(previous["players"], players_, players, fingerprint_keys["players"])
+
+    #############
+    ### clubs ###
+    #############
+
+    clubs_ = calc_club_market_values(clubs[clubs["club_id"].isin(club_ids)].copy(), players[players["club_id"].isin(club_ids)])
+    clubs = merge_rows(previous["clubs"], clubs_, clubs, fingerprint_keys["clubs"])
+
+    ###################
+    ### appearances ###
+    ###################
+
+    # Appearances of removed players, or players whose club left the selection, get a weighted market value of 0
+    appearance_keys = appearances.set_index(fingerprint_keys["appearances"]).index
+    changed_appearance_keys = changed_appearances.set_index(fingerprint_keys["appearances"]).index
+    reweighted_player_ids = set(changed_players["player_id"]) | set(outdated_players["player_id"])
+    appearances_ = appearances[
+        appearance_keys.isin(changed_appearance_keys) | appearances["player_id"].isin(reweighted_player_ids).to_numpy()
+    ].copy()
+    appearances_ = calc_weighted_market_values(appearances_, players)
+    appearances = merge_rows(previous["appearances"], appearances_, appearances, fingerprint_keys["appearances"])
+
+    #############
+    ### games ###
+    #############
+
+    # Games of reweighted appearances, including those of removed players
+    game_ids |= set(appearances_["game_id"])
+    games_ = games[
+        games["game_id"].isin(game_ids) | games["home_club_id"].isin(club_ids) | games["away_club_id"].isin(club_ids)
+    ].copy()
+    club_weighted_market_values = calc_club_weighted_market_values(appearances[appearances["game_id"].isin(games_["game_id"])])
+    games_ = build_games(games_, clubs, club_weighted_market_values)
+    games = merge_rows(previous["games"], games_, games, fingerprint_keys["games"])
+
+    write_outputs({"players": players, "clubs": clubs, "appearances": appearances, "games": games}, data_dir)
+    fingerprints.save(digests, rows)
+
+def build_partition(league_id, season, players, clubs, games, appearances, current_date, output_dir):
+    """
+        Builds and writes the outputs of one (league_id, season) partition. Runs in a worker process.
+        players and clubs are those of the league, players with their market values. games are all games of the
+        season, appearances those of the league's players or in the league's games with weighted market values.
+        Returns the number of players, clubs, appearances and games written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Players get the totals of all their appearances in the season, also those in other leagues
+    summary = summarize_appearances(appearances[appearances["player_id"].isin(players["player_id"])], games)
+    players = build_players(players, clubs, summary, current_date, output_dir)
+    clubs = calc_club_market_values(clubs, players)
+
+    # Games and appearances are those of the league's competition
+    games = games[games["league_code"] == league_id].copy()
+    appearances = appearances[appearances["game_id"].isin(games["game_id"])]
+    games = build_games(games, clubs, calc_club_weighted_market_values(appearances))
+
+    outputs = {"players": players, "clubs": clubs, "appearances": appearances, "games": games}
+    write_outputs(outputs, output_dir)
+    return {name: len(output) for name, output in outputs.items()}
+
+def run_partitioned(current_date, data_dir="data", league_ids=top_league_ids, seasons=None, workers=None):
+    """
+        Runs the pipeline for each league and season separately on a pool of workers processes and writes the
+        outputs to data/partitions/<league_id>/<season>/ (see partitions.py).
+        Market values are scraped once for all players up front, weighted market values need the market values
+        of players from other leagues.
+    """
+    inputs = load_inputs(data_dir, league_ids=league_ids, seasons=seasons)
+    players, clubs, appearances, games = (inputs[name] for name in input_names)
+    if seasons is None:
+        seasons = sorted(games["season"].unique())
+
+    scraper = create_scraper(data_dir)
+    players["market_value"] = scrape_market_values(players, scraper, data_dir)
+    scraper.checkpoint.close()
+
+    appearances = calc_weighted_market_values(appearances, players)
+    appearance_seasons = appearances["game_id"].map(games.set_index("game_id")["season"])
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for season in seasons:
+            season_games = games[games["season"] == season]
+            season_appearances = appearances[(appearance_seasons == season).to_numpy()]
+            for league_id in league_ids:
+                league_players = players[players["league_id"] == league_id]
+                league_game_ids = season_games.loc[season_games["league_code"] == league_id, "game_id"]
+                partition_appearances = season_appearances[
+                    season_appearances["player_id"].isin(league_players["player_id"])
+                    | season_appearances["game_id"].isin(league_game_ids)
+                ]
+                futures[(league_id, season)] = executor.submit(
+                    build_partition, league_id, season,
+                    league_players.copy(), clubs[clubs["league_id"] == league_id].copy(),
+                    season_games.copy(), partition_appearances.copy(),
+                    current_date, partition_dir(league_id, season, data_dir)
+                )
+
+        for (league_id, season), future in futures.items():
+            counts = future.result()
+            print(f"{league_id} {season}: " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Enriches the transfermarkt data of the top 5 leagues")
+    parser.add_argument("--leagues", nargs="+", default=top_league_ids, metavar="LEAGUE_ID",
+                        help="league ids to process (default: %(default)s)")
+    parser.add_argument("--seasons", nargs="+", type=int, metavar="SEASON",
+                        help="seasons to process (default: all seasons in games.csv)")
+    # The reference date for ages defaults to the production date of the data
+    parser.add_argument("--date", default="2021-06-08", type=lambda d: datetime.strptime(d, "%Y-%m-%d"),
+                        help="reference date for player ages, YYYY-MM-DD (default: %(default)s)")
+    parser.add_argument("--data-dir", default="data", help="directory of the input and output files (default: %(default)s)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true",
+                      help="only update the outputs of the previous run for new, changed and removed input rows")
+    mode.add_argument("--chunksize", type=int,
+                      help="stream appearances.csv in chunks of this many rows to bound memory use")
+    mode.add_argument("--partitioned", action="store_true",
+                      help="process each league and season in a separate worker process and write one output "
+                           "directory per partition to <data-dir>/partitions/")
+    parser.add_argument("--workers", type=int,
+                        help="number of worker processes for --partitioned (default: number of CPUs)")
+    args = parser.parse_args()
+
+    state_dir = os.path.join(args.data_dir, "state")
+    if args.incremental:
+        run_incremental(args.date, args.data_dir, state_dir, args.leagues, args.seasons)
+    elif args.chunksize:
+        run_streaming(args.date, args.chunksize, args.data_dir, state_dir, args.leagues, args.seasons)
+    elif args.partitioned:
+        run_partitioned(args.date, args.data_dir, args.leagues, args.seasons, args.workers)
+    else:
+        run_full(args.date, args.data_dir, state_dir, args.leagues, args.seasons)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+    Declared column types of the frames used by the dashboard.
+
+    Columns the dashboard does not use (the unnamed index column of players_extended.csv, url, ...) are dropped.
+    Repeated strings become categoricals and counters narrow integers, so every app
+    process keeps a fraction of the memory of the inferred frames and groupby works on integer codes.
+    Market values and coordinates keep their precision.
+
+    benchmarks/schema.py reports the memory use per frame before and after applying the schema.
+"""
+import numpy as np
+import pandas as pd
+
+SCHEMAS = {
+    "players": {
+        "player_id": "int32",
+        "club_id": "int32",
+        "pretty_name": "object",
+        "position": "category",
+        "sub_position": "category",
+        "league_id": "category",
+        "club_name": "category",
+        "market_value": "int64",
+        "games": "int16",
+        "minutes_played": "int16",
+        "goals": "int16",
+        "assists": "int16",
+        "wins": "int16",
+        "draws": "int16",
+        "losses": "int16",
+        "yellow_cards": "int16",
+        "red_cards": "int16",
+        "age": "int8"
+    },
+    "clubs": {
+        "club_id": "int32",
+        "pretty_name": "object",
+        "league_id": "category",
+        "market_value": "int64",
+        "latitude": "float64",
+        "longitude": "float64"
+    },
+    "games": {
+        "game_id": "int32",
+        "league_code": "category",
+        "season": "int16",
+        "home_club_id": "int32",
+        "away_club_id": "int32",
+        "home_club_goals": "int8",
+        "away_club_goals": "int8",
+        "weighted_market_value_home": "float64",
+        "weighted_market_value_away": "float64",
+        "home_club_name": "category",
+        "away_club_name": "category"
+    }
+}
+
+def apply_schema(df, name):
+    """
+        Returns the columns of df declared in SCHEMAS[name] with their declared types. Declared columns missing
+        in df are skipped. Integer columns with missing values become float64 like read_csv would make them, which
+        holds market values exactly. Integer columns with values outside the range of the declared type become int64
+        instead of wrapping around.
+    """
+    columns = {}
+    for column, dtype in SCHEMAS[name].items():
+        if column not in df:
+            continue
+        values = df[column]
+        if dtype.startswith("int"):
+            limits = np.iinfo(dtype)
+            if values.isna().any():
+                dtype = "float64"
+            elif len(values) and (values.min() < limits.min or values.max() > limits.max):
+                dtype = "int64"
+        columns[column] = values.astype(dtype)
+    return pd.DataFrame(columns, index=df.index)
+
+def memory_usage(df):
+    """
+        Returns the memory used by df in bytes, including the strings of object columns
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+def memory_report(frames):
+    """
+        Returns a table of the memory use of each (name, before, after) frame pair
+    """
+    lines = [f"{'frame':10} {'columns':>13} {'before (KiB)':>13} {'after (KiB)':>12} {'saved':>6}"]
+    for name, before, after in frames:
+        before_size, after_size = memory_usage(before), memory_usage(after)
+        lines.append(
+            f"{name:10} {len(before.columns):>6} -> {len(after.columns):<3} {before_size / 1024:13.1f} "
+            f"{after_size / 1024:12.1f} {1 - after_size / before_size:6.0%}"
+        )
+    return "\n".join(lines)
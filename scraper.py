@@ -0,0 +1,189 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit, urlunsplit
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from tqdm import tqdm
+
+from market_value import parse_market_value
+
+# Fix headers
+headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/47.0.2526.106 Safari/537.36'}
+
+# Status codes worth another attempt, everything else is reported right away
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class ScrapeError(Exception):
+    """
+        Raised when a page could not be fetched or parsed, remembers how many attempts were made
+    """
+    def __init__(self, error, attempts):
+        super().__init__(str(error))
+        self.attempts = attempts
+
+class RateLimiter:
+    """
+        Spaces out calls so that at most `rate` calls per second are made. Thread safe.
+    """
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = 0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class ScrapeReport:
+    """
+        Collects the outcome of a scraping run
+    """
+    def __init__(self):
+        self.succeeded = 0
+        self.resumed = 0
+        self.failures = []
+        self.lock = threading.Lock()
+
+    def add_success(self):
+        with self.lock:
+            self.succeeded += 1
+
+    def add_failure(self, key, url, error, attempts):
+        with self.lock:
+            self.failures.append({"player_id": key, "url": url, "error": str(error), "attempts": attempts})
+
+    def to_frame(self):
+        return pd.DataFrame(self.failures, columns=["player_id", "url", "error", "attempts"])
+
+    def __str__(self):
+        return f"{self.succeeded} succeeded, {self.resumed} resumed from checkpoint, {len(self.failures)} failed"
+
+class MarketValueScraper:
+    """
+        Scrapes player market values with a bounded pool of worker threads sharing one keep-alive session.
+        Requests are rate limited per host and retried with exponential backoff.
+        base_url replaces scheme and host of every url, e.g. to run against a local stand-in server.
+        An optional ResponseCache avoids downloading fresh pages again, an optional MarketValueCheckpoint
+        skips players that were already scraped. Market values in another currency than `currency` (pounds on
+        transfermarkt.co.uk) are reported as failures, so values in different currencies are never summed up.
+    """
+    def __init__(self, workers=8, rate=4, retries=3, backoff=1, timeout=10, base_url=None, session=None, cache=None, checkpoint=None,
+                 currency="£"):
+        self.workers = workers
+        self.rate = rate
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.base_url = base_url
+        self.cache = cache
+        self.checkpoint = checkpoint
+        self.currency = currency
+        self.session = session or self.create_session()
+        self.rate_limiters = {}
+        self.rate_limiters_lock = threading.Lock()
+
+    def create_session(self):
+        session = requests.Session()
+        session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def rewrite_url(self, url):
+        if self.base_url is None:
+            return url
+        base = urlsplit(self.base_url)
+        parts = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, base.path.rstrip("/") + parts.path, parts.query, parts.fragment))
+
+    def rate_limiter(self, url):
+        host = urlsplit(url).netloc
+        with self.rate_limiters_lock:
+            if host not in self.rate_limiters:
+                self.rate_limiters[host] = RateLimiter(self.rate)
+            return self.rate_limiters[host]
+
+    def fetch(self, url):
+        """
+            Downloads url and returns the response content together with the number of attempts used.
+            Connection errors and retryable status codes are retried, other errors raise ScrapeError immediately.
+            Fresh pages are served from the cache without a request, stale ones are revalidated.
+        """
+        cached, validators = None, {}
+        if self.cache is not None:
+            cached = self.cache.lookup(url)
+            if cached is not None:
+                content, is_fresh, validators = cached
+                if is_fresh:
+                    return content, 0
+
+        request_url = self.rewrite_url(url)
+        limiter = self.rate_limiter(request_url)
+        for attempt in range(1, self.retries + 2):
+            limiter.wait()
+            try:
+                response = self.session.get(request_url, timeout=self.timeout, headers=validators)
+                if response.status_code == 304 and cached is not None:
+                    self.cache.touch(url)
+                    return content, attempt
+                response.raise_for_status()
+                if self.cache is not None:
+                    self.cache.store(url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+                return response.content, attempt
+            except requests.HTTPError as e:
+                if e.response.status_code not in RETRY_STATUS_CODES:
+                    raise ScrapeError(e, attempt)
+                error = e
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            except requests.RequestException as e:
+                raise ScrapeError(e, attempt)
+            if attempt > self.retries:
+                raise ScrapeError(error, attempt)
+            time.sleep(self.backoff * 2 ** (attempt - 1))
+
+    def scrape_one(self, url):
+        content, attempts = self.fetch(url)
+        try:
+            return parse_market_value(content, self.currency)
+        except ValueError as e:
+            raise ScrapeError(e, attempts)
+
+    def scrape(self, urls):
+        """
+            Scrapes the market value for each url of a series, e.g. players.set_index("player_id")["url"].
+            Returns a float series with the same index (NaN where scraping failed) and a ScrapeReport.
+            With a checkpoint the index has to be the player_id, players found in the checkpoint are not scraped again.
+        """
+        market_values = pd.Series(float("nan"), index=urls.index, dtype=float)
+        if self.checkpoint is not None:
+            market_values = self.checkpoint.load().reindex(urls.index).astype(float)
+
+        report = ScrapeReport()
+        pending = market_values.isna().to_numpy()
+        report.resumed = int((~pending).sum())
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.scrape_one, url): (position, key, url)
+                       for position, (key, url) in enumerate(urls.items()) if pending[position]}
+            for future in tqdm(as_completed(futures), total=len(futures)):
+                position, key, url = futures[future]
+                try:
+                    market_value = future.result()
+                except ScrapeError as e:
+                    report.add_failure(key, url, e, e.attempts)
+                    continue
+                market_values.iat[position] = market_value
+                report.add_success()
+                if self.checkpoint is not None:
+                    self.checkpoint.add(key, market_value)
+
+        return market_values, report
@@ -0,0 +1,108 @@
+"""
+    Versioned snapshots of the dashboard data, reloaded in the background when the data files change.
+
+    A snapshot holds the loaded frames and everything derived from them. The manager polls the signature (size
+    and modification time) of the data files and, once a change has settled for one poll interval, builds the
+    next version in a background thread while callbacks keep using the current one. The new snapshot is then
+    swapped in with a single assignment: callbacks already running finish on the snapshot they started with,
+    later callbacks get the new one. If loading fails, the current snapshot stays in place.
+
+    Threads do not survive a fork, so every process (e.g. each gunicorn worker) starts its own watcher on first use.
+"""
+import os
+import threading
+import time
+import traceback
+
+def files_signature(paths):
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            signature.append((path, None, None))
+            continue
+        signature.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(signature)
+
+class SnapshotManager:
+    """
+        Holds the current snapshot, built by load(version, previous) from the files returned by sources().
+        Versions count up from 1. With interval None the files are not watched.
+    """
+    def __init__(self, load, sources, interval=5):
+        self.load = load
+        self.sources = sources
+        self.interval = interval
+        self.signature = files_signature(sources())
+        self.pending_signature = None
+        self.current = load(1, None)
+        self.loaded_at = time.time()
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.lock = threading.Lock()
+        self.watcher_pid = None
+
+    def get(self):
+        """
+            Returns the current snapshot, callbacks keep the returned snapshot for their whole run
+        """
+        if self.interval is not None and self.watcher_pid != os.getpid():
+            self.watch()
+        return self.current
+
+    def watch(self):
+        with self.lock:
+            if self.watcher_pid == os.getpid():
+                return
+            self.watcher_pid = os.getpid()
+            threading.Thread(target=self.run, name="snapshot-watcher", daemon=True).start()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+    def check(self):
+        """
+            Loads and swaps in the next version if the data files changed and have not changed since the
+            previous check. Returns whether a new version was swapped in.
+        """
+        signature = files_signature(self.sources())
+        if signature == self.signature:
+            self.pending_signature = None
+            return False
+        # Files that are still being written differ between two checks, they are loaded once they settled
+        if signature != self.pending_signature:
+            self.pending_signature = signature
+            return False
+
+        previous = self.current
+        try:
+            snapshot = self.load(previous.version + 1, previous)
+        except Exception:
+            self.failures += 1
+            self.last_error = traceback.format_exc(limit=1)
+            print(f"Could not load data version {previous.version + 1}, keeping version {previous.version}:\n{self.last_error}")
+            # Retried once the files change again
+            self.signature = signature
+            return False
+
+        self.current = snapshot
+        self.signature = signature
+        self.pending_signature = None
+        self.loaded_at = time.time()
+        self.reloads += 1
+        return True
+
+    def stats(self):
+        return {
+            "version": self.current.version,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "interval": self.interval,
+            "sources": len(self.signature)
+        }
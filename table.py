@@ -0,0 +1,128 @@
+"""
+    Server-side paging, sorting and filtering for DataTables with page_action, sort_action and
+    filter_action set to 'custom'.
+
+    Every sortable column keeps a pre-sorted array of row positions for both directions, so a sorted page of a
+    selection is a boolean lookup along that array instead of a sort. Filters are DataTable filter_query
+    expressions, e.g. '{age} > 25 && {club_name} contains "Bayern"'.
+"""
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+FILTER_TERM = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s*"
+    r"(?P<operator>is not blank|is blank|[is]?(?:>=|<=|!=|=|<|>)|[a-z]+)\s*"
+    r"(?P<value>.*)$"
+)
+OPERATORS = {">=": "ge", "<=": "le", "<": "lt", ">": "gt", "!=": "ne", "=": "eq"}
+COMPARISONS = {"eq", "ne", "lt", "le", "gt", "ge", "contains", "datestartswith"}
+
+def unquote(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+        return value[1:-1].replace("\\" + value[0], value[0])
+    return value
+
+def parse_filter_query(filter_query):
+    """
+        Splits a DataTable filter_query into (column, operator, value, case_sensitive) tuples.
+        Symbols are translated to their names (>= to ge, ...), i-prefixed operators (icontains, ieq, i>=, ...)
+        compare case insensitive, s-prefixed ones case sensitive like unprefixed ones. Terms that cannot be
+        parsed are skipped.
+    """
+    terms = []
+    for term in (filter_query or "").split(" && "):
+        match = FILTER_TERM.match(term.strip())
+        if match is None:
+            continue
+        operator = match.group("operator")
+        case_sensitive = True
+        if operator[0] in "is" and OPERATORS.get(operator[1:], operator[1:]) in COMPARISONS:
+            case_sensitive = operator[0] == "s"
+            operator = operator[1:]
+        operator = OPERATORS.get(operator, operator)
+        if operator not in COMPARISONS and operator not in ("is blank", "is not blank"):
+            continue
+        terms.append((match.group("column"), operator, unquote(match.group("value")), case_sensitive))
+    return terms
+
+def filter_mask(df, terms):
+    """
+        Returns a boolean array marking the rows of df matching all terms of parse_filter_query
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for column, operator, value, case_sensitive in terms:
+        if column not in df:
+            continue
+        values = df[column]
+        if operator in ("is blank", "is not blank"):
+            blank = values.isna() | (values.astype(str) == "")
+            mask &= (blank if operator == "is blank" else ~blank).to_numpy()
+            continue
+
+        if operator in ("contains", "datestartswith") or not pd.api.types.is_numeric_dtype(values):
+            strings = values.astype(str).where(values.notna(), "")
+            if not case_sensitive:
+                strings, value = strings.str.lower(), value.lower()
+            if operator == "contains":
+                matched = strings.str.contains(value, regex=False)
+            elif operator == "datestartswith":
+                matched = strings.str.startswith(value)
+            else:
+                matched = getattr(strings, operator)(value) & values.notna()
+        else:
+            try:
+                number = float(value)
+            except ValueError:
+                mask[:] = False
+                continue
+            matched = getattr(values, operator)(number)
+        mask &= matched.fillna(False).to_numpy(dtype=bool)
+    return mask
+
+class TableIndex:
+    """
+        Pre-sorted row positions of df for each of the given columns, ascending and descending.
+        Missing values are sorted last in both directions, ties keep the row order.
+    """
+    def __init__(self, df, columns, default_sort=None):
+        self.df = df[columns].reset_index(drop=True)
+        self.default_sort = default_sort or []
+        self.orders = {}
+        for column in columns:
+            ranks = self.df[column].rank(method="dense").to_numpy()
+            missing = np.isnan(ranks)
+            ascending = np.where(missing, np.inf, ranks)
+            descending = np.where(missing, np.inf, -ranks)
+            self.orders[(column, "asc")] = np.argsort(ascending, kind="stable")
+            self.orders[(column, "desc")] = np.argsort(descending, kind="stable")
+
+    def query(self, positions, page_current=0, page_size=10, sort_by=None, filter_query=None):
+        """
+            Returns the records of one page, the page count and the page shown for the rows at positions (e.g.
+            the players of the selected leagues), filtered by filter_query and sorted by the first entry of
+            sort_by (DataTable format, [{"column_id": ..., "direction": "asc" | "desc"}]).
+            The page shown is page_current clamped to the pages of the selection.
+        """
+        mask = np.zeros(len(self.df), dtype=bool)
+        mask[positions] = True
+        terms = parse_filter_query(filter_query)
+        if terms:
+            mask &= filter_mask(self.df, terms)
+
+        sort_by = sort_by or self.default_sort
+        if sort_by:
+            order = self.orders[(sort_by[0]["column_id"], sort_by[0]["direction"])]
+            selected = order[mask[order]]
+        else:
+            selected = np.flatnonzero(mask)
+
+        page_size = page_size or 10
+        page_count = max(1, math.ceil(len(selected) / page_size))
+        # A narrower selection can leave the current page past the end, the last page is shown instead
+        page_current = min(max(page_current or 0, 0), page_count - 1)
+        page = selected[page_current * page_size:(page_current + 1) * page_size]
+        return self.df.take(page).to_dict('records'), page_count, page_current
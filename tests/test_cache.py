@@ -0,0 +1,33 @@
+"""
+    Size accounting and eviction of ResponseCache
+"""
+import hashlib
+import os
+
+from cache import TOTAL_SIZE_QUERY, ResponseCache
+
+def stored_size(cache):
+    return cache.db.execute(TOTAL_SIZE_QUERY).fetchone()[0]
+
+def test_running_total_matches_stored_bodies(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10 ** 6)
+    cache.store("a", b"x" * 100)
+    cache.store("b", b"x" * 100)
+    cache.store("c", b"y" * 50)
+    # Replacing a body frees the previous one
+    cache.store("c", b"z" * 70)
+    assert cache.size() == stored_size(cache) == 170
+    assert not os.path.exists(cache.object_path(hashlib.sha256(b"y" * 50).hexdigest()))
+
+    # A reopened cache starts from the stored bodies
+    assert ResponseCache(str(tmp_path)).size() == 170
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=250)
+    cache.store("a", b"a" * 100)
+    cache.store("b", b"b" * 100)
+    cache.lookup("a")
+    cache.store("c", b"c" * 100)
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") is not None and cache.lookup("c") is not None
+    assert cache.size() == stored_size(cache) == 200
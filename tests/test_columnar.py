@@ -0,0 +1,36 @@
+"""
+    Round trip and failure handling of the columnar tables
+"""
+import os
+
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+import columnar
+
+def test_round_trip(tmp_path):
+    df = pd.DataFrame({
+        "player_id": [1, 2, 3],
+        "name": ["a", None, "c"],
+        "age": pd.array([20, None, 31], dtype="Int64"),
+        "market_value": [1.5e6, 0.0, 4.25e7]
+    })
+    columnar.write_columnar(df, str(tmp_path / "players"))
+    tm.assert_frame_equal(columnar.read_columnar(str(tmp_path / "players"), mmap=False), df)
+
+def test_failed_swap_leaves_no_temporary_copies(tmp_path, monkeypatch):
+    directory = str(tmp_path / "players")
+    columnar.write_columnar(pd.DataFrame({"player_id": [1, 2]}), directory)
+
+    replace = os.replace
+    def failing_replace(src, dst):
+        if ".tmp" in str(src):
+            raise OSError("directory not empty")
+        replace(src, dst)
+    monkeypatch.setattr(os, "replace", failing_replace)
+
+    with pytest.raises(OSError):
+        columnar.write_columnar(pd.DataFrame({"player_id": [3]}), directory)
+    assert os.listdir(tmp_path) == ["players"]
+    assert columnar.read_columnar(directory)["player_id"].tolist() == [1, 2]
@@ -0,0 +1,47 @@
+"""
+    Scope of the dashboard callbacks: the callbacks each interaction fires (timings are in
+    benchmarks/interactions.py)
+"""
+import os
+
+import pytest
+
+# The tests work on the loaded snapshot, the data files are not watched
+os.environ["DATA_RELOAD_INTERVAL"] = "0"
+
+from benchmarks.interactions import INITIAL_STATE, callback_graph
+
+LEAGUE_CALLBACKS = {"update_bar_chart", "update_base_club_stats", "update_base_player_stats", "update_density_pitch", "update_players_table"}
+
+@pytest.fixture(scope="module")
+def graph():
+    return callback_graph()
+
+def fire(graph, changed, value):
+    """
+        Runs the callbacks fired by changing one input and returns their outputs by callback name
+    """
+    state = {**INITIAL_STATE, changed: value}
+    return {name: function(*[state[key] for key in inputs]) for name, function, inputs, _ in graph if changed in inputs}
+
+def test_league_change_updates_league_outputs_only(graph):
+    outputs = fire(graph, ("league-dropdown", "value"), ["GB1", "L1", "ES1"])
+    assert set(outputs) == LEAGUE_CALLBACKS
+
+def test_pitch_filter_change_updates_density_pitch_only(graph):
+    outputs = fire(graph, ("density-pitch-dropdown", "value"), "MEAN")
+    assert set(outputs) == {"update_density_pitch"}
+
+@pytest.mark.parametrize("changed, value", [
+    (("players-table", "page_current"), 3),
+    (("players-table", "page_size"), 25),
+    (("players-table", "sort_by"), [{"column_id": "age", "direction": "asc"}]),
+    (("players-table", "filter_query"), "{age} > 25")
+])
+def test_table_change_updates_players_table_only(graph, changed, value):
+    outputs = fire(graph, changed, value)
+    assert set(outputs) == {"update_players_table"}
+    page_size = value if changed == ("players-table", "page_size") else INITIAL_STATE[("players-table", "page_size")]
+    records, page_count, page_current = outputs["update_players_table"]
+    assert 0 < len(records) <= page_size
+    assert page_current < page_count
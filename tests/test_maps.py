@@ -0,0 +1,128 @@
+"""
+    GoogleGeocoder and geocode_clubs against a local stand-in server answering like the geocoding API
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import pytest
+
+from cache import CoordinateCache
+from maps import GeocodingError, GoogleGeocoder, geocode_clubs, seed_cache
+
+def found(latitude, longitude):
+    return {"status": "OK", "results": [{"geometry": {"location": {"lat": latitude, "lng": longitude}}}]}
+
+ZERO_RESULTS = {"status": "ZERO_RESULTS", "results": []}
+OVER_QUERY_LIMIT = {"status": "OVER_QUERY_LIMIT", "results": [], "error_message": "You have exceeded your rate-limit"}
+
+class StandInServer(ThreadingHTTPServer):
+    """
+        Answers each address with the next of its configured responses, the last one is repeated.
+        Unknown addresses get ZERO_RESULTS. Counts the requests per address.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.responses = {}
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/maps/api/geocode/json"
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        address = parse_qs(urlsplit(self.path).query)["address"][0]
+        with server.lock:
+            server.requests[address] = server.requests.get(address, 0) + 1
+            responses = server.responses.get(address, [ZERO_RESULTS])
+            response = responses.pop(0) if len(responses) > 1 else responses[0]
+
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def create_geocoder(server):
+    return GoogleGeocoder(base_url=server.url, retries=2, backoff=0)
+
+def test_returns_first_result(server):
+    server.responses["Manchester United"] = [found(53.4631, -2.2913)]
+    assert create_geocoder(server).geocode("Manchester United", "gb") == (53.4631, -2.2913)
+
+def test_no_result(server):
+    assert create_geocoder(server).geocode("Nowhere FC", None) is None
+
+@pytest.mark.parametrize("status", ["REQUEST_DENIED", "INVALID_REQUEST", "UNKNOWN_ERROR"])
+def test_raises_api_errors(server, status):
+    server.responses["Manchester United"] = [{"status": status, "results": [], "error_message": "the message"}]
+    with pytest.raises(GeocodingError, match=f"{status}: the message"):
+        create_geocoder(server).geocode("Manchester United", "gb")
+
+def test_retries_over_query_limit(server):
+    server.responses["Manchester United"] = [OVER_QUERY_LIMIT, OVER_QUERY_LIMIT, found(53.4631, -2.2913)]
+    assert create_geocoder(server).geocode("Manchester United", "gb") == (53.4631, -2.2913)
+    assert server.requests["Manchester United"] == 3
+
+    server.responses["Real Madrid"] = [OVER_QUERY_LIMIT]
+    with pytest.raises(GeocodingError, match="OVER_QUERY_LIMIT: You have exceeded"):
+        create_geocoder(server).geocode("Real Madrid", "es")
+    assert server.requests["Real Madrid"] == 3
+
+def test_geocode_clubs_looks_up_misses_only(server, tmp_path):
+    clubs = pd.DataFrame({
+        "name": ["Manchester United", "Bayern Munich", "Real Madrid", "Nowhere FC", "Denied FC"],
+        "league_id": ["GB1", "L1", "ES1", "FR1", "IT1"]
+    })
+    cache = CoordinateCache(str(tmp_path / "coordinates.csv"))
+    cache.add("Manchester United", "gb", 53.4631, -2.2913)
+    # Resolved in a previous clubs_extended.csv
+    assert seed_cache(cache, pd.DataFrame({
+        "name": ["Bayern Munich", "Nowhere FC"], "league_id": ["L1", "FR1"],
+        "latitude": [48.2188, None], "longitude": [11.6247, None]
+    })) == 1
+    server.responses["Real Madrid"] = [found(40.4531, -3.6883)]
+    server.responses["Denied FC"] = [{"status": "REQUEST_DENIED", "results": [], "error_message": "The provided API key is invalid."}]
+
+    clubs, failures = geocode_clubs(clubs, cache, lambda: create_geocoder(server), workers=2, rate=None)
+
+    assert server.requests == {"Real Madrid": 1, "Nowhere FC": 1, "Denied FC": 1}
+    assert clubs["latitude"].tolist()[:3] == [53.4631, 48.2188, 40.4531]
+    assert clubs["longitude"].tolist()[:3] == [-2.2913, 11.6247, -3.6883]
+    assert clubs[["latitude", "longitude"]].iloc[3:].isna().all().all()
+    assert sorted(failures) == [("Denied FC", "REQUEST_DENIED: The provided API key is invalid."), ("Nowhere FC", "no results")]
+    assert cache.get("Real Madrid", "es") == (40.4531, -3.6883)
+    cache.close()
+
+def test_geocode_clubs_without_misses_needs_no_backend(tmp_path):
+    cache = CoordinateCache(str(tmp_path / "coordinates.csv"))
+    cache.add("Manchester United", "gb", 53.4631, -2.2913)
+    clubs = pd.DataFrame({"name": ["Manchester United"], "league_id": ["GB1"]})
+
+    def create_backend():
+        raise AssertionError("no lookup expected")
+
+    clubs, failures = geocode_clubs(clubs, cache, create_backend)
+    assert failures == []
+    assert clubs["latitude"].tolist() == [53.4631]
+    cache.close()
@@ -0,0 +1,36 @@
+"""
+    Market value parsing of transfermarkt profile pages
+"""
+import pytest
+
+from market_value import parse_market_value, parse_market_value_text
+
+@pytest.mark.parametrize("text, expected", [
+    ("£45.00m", (45000000, "£")),
+    ("€1.20bn", (1200000000, "€")),
+    ("$2.50m", (2500000, "$")),
+    ("£500Th.", (500000, "£")),
+    ("€750k", (750000, "€")),
+    ("£1,500", (1500, "£")),
+    ("45,00 Mio. €", (45000000, "€")),
+    ("1,20 Mrd. €", (1200000000, "€")),
+    ("500 Tsd. €", (500000, "€")),
+    ("1.500,50 €", (1500.5, "€")),
+    ("\n\t£45.00m \n Last update: 12.05.2021", (45000000, "£")),
+    ("Last update 12.05.2021 £45.00m", (45000000, "£")),
+    ("Letzte Änderung: 12.05.2021 45,00 Mio. €", (45000000, "€")),
+    ("Stand 500 £45.00m", (45000000, "£")),
+])
+def test_parses_market_values(text, expected):
+    assert parse_market_value_text(text) == expected
+
+@pytest.mark.parametrize("text", ["-", "Last update 12.05.2021", "12.05.2021 €"])
+def test_rejects_text_without_market_value(text):
+    with pytest.raises(ValueError):
+        parse_market_value_text(text)
+
+def test_page_in_another_currency():
+    page = b'<div class="dataMarktwert"><a>45,00 <span class="waehrung">Mio. &euro;</span></a></div>'
+    assert parse_market_value(page) == 45000000
+    with pytest.raises(ValueError, match="in € instead of £"):
+        parse_market_value(page, "£")
@@ -0,0 +1,29 @@
+"""
+    Versioned memoization of callback outputs
+"""
+from memo import CallbackCache
+
+def test_looks_up_the_version_on_first_use():
+    versions = []
+    cache = CallbackCache(version=lambda: versions.append(1) or 1)
+    assert versions == []
+
+    calls = []
+    @cache.memoize(lambda league_ids: tuple(sorted(league_ids)))
+    def callback(league_ids):
+        calls.append(league_ids)
+        return {"leagues": league_ids}
+
+    assert callback(["L1", "GB1"]) == {"leagues": ["L1", "GB1"]}
+    assert callback(["GB1", "L1"]) == {"leagues": ["L1", "GB1"]}
+    assert calls == [["L1", "GB1"]]
+    assert cache.stats()["version"] == 1
+
+def test_drops_outputs_of_older_versions():
+    version = [1]
+    cache = CallbackCache(version=lambda: version[0])
+    callback = cache.memoize(lambda league: league)(lambda league: [league, version[0]])
+    assert callback("GB1") == ["GB1", 1]
+    version[0] = 2
+    assert callback("GB1") == ["GB1", 2]
+    assert cache.stats()["invalidations"] == 1
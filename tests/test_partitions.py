@@ -0,0 +1,26 @@
+"""
+    Loading players from partitions of several seasons
+"""
+import pandas as pd
+import pandas.testing as tm
+
+from partitions import combine_player_seasons, partition_dir, load_partitions, season_total_columns
+
+def season_players(season, goals):
+    players = pd.DataFrame({"player_id": [1, 2], "club_id": [10 + season % 2, 20], "market_value": [1e6, 2e6]})
+    for column in season_total_columns:
+        players[column] = 1
+    players["goals"] = goals
+    return players
+
+def test_combines_seasons_of_a_player(tmp_path):
+    for season, goals in [(2019, [3, 0]), (2020, [5, 1])]:
+        directory = tmp_path / partition_dir("GB1", season, "data")
+        directory.mkdir(parents=True)
+        season_players(season, goals).to_csv(directory / "players_updated.csv", index=False)
+
+    players = combine_player_seasons(load_partitions("players", seasons=[2019, 2020], data_dir=str(tmp_path / "data")))
+
+    expected = season_players(2020, [8, 1])
+    expected[[column for column in season_total_columns if column != "goals"]] = 2
+    tm.assert_frame_equal(players, expected)
@@ -0,0 +1,143 @@
+"""
+    Parity of the vectorized pipeline steps with the per-row loops of the original preprocessing.py, on the
+    synthetic inputs of benchmarks/synthetic.py
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+import pytest
+
+import preprocessing
+from scraper import ScrapeReport
+from benchmarks.synthetic import generate
+
+CURRENT_DATE = datetime(2021, 6, 8)
+
+@pytest.fixture(scope="module")
+def dataset():
+    dataset = generate(1)
+    players = dataset["players"]
+    # Players without appearances, with a missing and a malformed birth date and a birthday on the reference date
+    players.loc[0, "club_id"] = dataset["clubs"]["club_id"].iloc[-1]
+    players.loc[1, "date_of_birth"] = np.nan
+    players.loc[2, "date_of_birth"] = "unknown"
+    players.loc[3, "date_of_birth"] = "1990-06-08"
+    players.loc[4, "date_of_birth"] = "1990-06-09"
+    dataset["appearances"] = dataset["appearances"][~dataset["appearances"]["player_id"].isin(players["player_id"].iloc[:3])]
+    return dataset
+
+def enrich_players_per_row(players, clubs, appearances, current_date):
+    """
+        The per-row enrichment of the original preprocessing.py
+    """
+    for column in ["games", "minutes_played", "goals", "assists", "wins", "draws", "losses", "yellow_cards", "red_cards"]:
+        players[column] = 0
+    players["age"] = None
+
+    def calc_age(date_of_birth, current_date):
+        try:
+            date_of_birth = datetime.strptime(date_of_birth, "%Y-%m-%d")
+        except:
+            return None
+        return current_date.year - date_of_birth.year - ((current_date.month, current_date.day) < (date_of_birth.month, date_of_birth.day))
+
+    for ind, row in players.iterrows():
+        players.at[ind, "age"] = calc_age(row["date_of_birth"], current_date)
+
+    players.loc[players['position'] == "Goalkeeper", "sub_position"] = "Goalkeeper"
+
+    players["club_name"] = None
+    for ind, row in players.iterrows():
+        players.at[ind, "club_name"] = clubs.loc[clubs["club_id"] == row["club_id"], "pretty_name"].item()
+
+    player_stats = appearances[["player_id", "minutes_played", "goals", "assists", "yellow_cards", "red_cards"]].groupby("player_id").sum()
+    game_stats = appearances[["player_id", "game_id"]].groupby("player_id").count()
+    for ind, row in players.iterrows():
+        player_id = row["player_id"]
+        try:
+            for column in ["minutes_played", "goals", "assists", "yellow_cards", "red_cards"]:
+                players.at[ind, column] = player_stats.loc[player_id][column]
+            players.at[ind, "games"] = game_stats.loc[player_id]["game_id"]
+        except KeyError:
+            pass
+    return players
+
+def test_enrich_players_matches_per_row_loop(dataset):
+    players, clubs, appearances = dataset["players"], dataset["clubs"], dataset["appearances"]
+
+    expected = enrich_players_per_row(players.copy(), clubs, appearances, CURRENT_DATE)
+    # Ages are written and read back as nullable integers (see preprocessing.read_outputs)
+    expected["age"] = expected["age"].astype("Int64")
+    expected["club_name"] = expected["club_name"].astype(object)
+
+    player_totals = preprocessing.calc_player_totals(appearances)
+    actual = preprocessing.enrich_players(players.copy(), clubs, player_totals, pd.Timestamp(CURRENT_DATE))
+
+    tm.assert_frame_equal(actual, expected, check_dtype=True)
+
+class StandInScraper:
+    """
+        Returns fixed market values by player_id instead of scraping transfermarkt
+    """
+    def __init__(self, market_values):
+        self.market_values = market_values
+        self.checkpoint = self
+
+    def scrape(self, urls):
+        return self.market_values.reindex(urls.index).astype(float), ScrapeReport()
+
+    def close(self):
+        pass
+
+def write_inputs(dataset, data_dir):
+    data_dir.mkdir(exist_ok=True)
+    for name in preprocessing.input_names:
+        dataset[name].to_csv(data_dir / f"{name}.csv", index=False)
+
+def run_pipeline(run, dataset, market_values, data_dir, monkeypatch):
+    monkeypatch.setattr(preprocessing, "create_scraper", lambda data_dir="data": StandInScraper(market_values))
+    write_inputs(dataset, data_dir)
+    run(pd.Timestamp(CURRENT_DATE), str(data_dir), str(data_dir / "state"))
+    return preprocessing.read_outputs(str(data_dir))
+
+def test_incremental_run_matches_full_run(tmp_path, monkeypatch):
+    dataset = generate(1)
+    players = dataset["players"]
+    market_values = pd.Series(dataset["market_values"], index=players["player_id"])
+    run_pipeline(preprocessing.run_full, dataset, market_values, tmp_path / "incremental", monkeypatch)
+
+    # A new player with a few appearances, a player moving to another club and a removed player whose
+    # appearances stay in appearances.csv
+    changed = dict(dataset)
+    added = players.iloc[[0]].assign(player_id=players["player_id"].max() + 1)
+    changed["players"] = pd.concat([players, added], ignore_index=True)
+    changed["players"].loc[changed["players"]["player_id"] == 2, "club_id"] = dataset["clubs"]["club_id"].iloc[-1]
+    changed["players"] = changed["players"][changed["players"]["player_id"] != 3]
+    appearances = dataset["appearances"]
+    added_appearances = appearances[appearances["player_id"] == 1].head(3).assign(player_id=added["player_id"].iloc[0])
+    changed["appearances"] = pd.concat([appearances, added_appearances], ignore_index=True)
+
+    market_values = market_values.copy()
+    market_values[added["player_id"].iloc[0]] = 12000000
+    market_values[2] = 3500000
+
+    incremental = run_pipeline(preprocessing.run_incremental, changed, market_values, tmp_path / "incremental", monkeypatch)
+    full = run_pipeline(preprocessing.run_full, changed, market_values, tmp_path / "full", monkeypatch)
+    for name in preprocessing.input_names:
+        tm.assert_frame_equal(incremental[name], full[name], obj=name)
+
+def test_streaming_run_matches_full_run(tmp_path, monkeypatch):
+    dataset = generate(1)
+    market_values = pd.Series(dataset["market_values"], index=dataset["players"]["player_id"])
+
+    def run_streaming(current_date, data_dir, state_dir):
+        preprocessing.run_streaming(current_date, 5000, data_dir, state_dir)
+
+    streamed = run_pipeline(run_streaming, dataset, market_values, tmp_path / "streaming", monkeypatch)
+    full = run_pipeline(preprocessing.run_full, dataset, market_values, tmp_path / "full", monkeypatch)
+    for name in ["players", "clubs", "appearances"]:
+        tm.assert_frame_equal(streamed[name], full[name], check_exact=True, obj=name)
+    # Weighted market values of a game are summed up chunk by chunk, in another order than in one pass
+    tm.assert_frame_equal(streamed["games"], full["games"], rtol=1e-9, obj="games")
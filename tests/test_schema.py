@@ -0,0 +1,24 @@
+"""
+    Declared column types of the dashboard frames
+"""
+import numpy as np
+import pandas as pd
+
+from schema import apply_schema
+
+def test_keeps_weighted_market_values():
+    games = pd.DataFrame({"game_id": [1, 2], "weighted_market_value_home": [1234567.89, 0.5], "url": ["a", "b"]})
+    games = apply_schema(games, "games")
+    assert list(games.columns) == ["game_id", "weighted_market_value_home"]
+    assert games["weighted_market_value_home"].tolist() == [1234567.89, 0.5]
+
+def test_missing_values_keep_market_values_exact():
+    players = apply_schema(pd.DataFrame({"player_id": [1, 2], "market_value": [1234567891, np.nan]}), "players")
+    assert players["market_value"].dtype == "float64"
+    assert players["market_value"].iloc[0] == 1234567891
+
+def test_values_out_of_range_keep_a_wider_type():
+    players = apply_schema(pd.DataFrame({"player_id": [1, 2], "minutes_played": [40000, 90], "age": [300, 25], "goals": [3, 0]}), "players")
+    assert players["minutes_played"].tolist() == [40000, 90]
+    assert players["age"].tolist() == [300, 25]
+    assert players["goals"].dtype == "int16"
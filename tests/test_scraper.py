@@ -0,0 +1,121 @@
+"""
+    MarketValueScraper against a local stand-in server serving canned profile pages
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from cache import ResponseCache
+from scraper import MarketValueScraper, ScrapeError
+
+PAGE = b'<html><body><div class="dataMarktwert"><a>&pound;45.00<span class="waehrung">m</span></a></div></body></html>'
+ETAG = '"page-v1"'
+
+class StandInServer(ThreadingHTTPServer):
+    """
+        Serves PAGE for every path, after the number of 429 responses configured per path in rate_limited.
+        /missing answers 404 and pages are revalidated with ETAG. Counts the requests per path.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.rate_limited = {}
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests[self.path] = server.requests.get(self.path, 0) + 1
+            limited = server.rate_limited.get(self.path, 0) > 0
+            if limited:
+                server.rate_limited[self.path] -= 1
+
+        if self.path == "/missing":
+            self.send_response(404)
+        elif limited:
+            self.send_response(429)
+        elif self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+        else:
+            self.send_response(200)
+            self.send_header("ETag", ETAG)
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+            return
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def create_scraper(server, **kwargs):
+    # No rate limit and no backoff, the stand-in server answers right away
+    return MarketValueScraper(workers=2, rate=None, retries=2, backoff=0, timeout=5, base_url=server.url, **kwargs)
+
+def test_retries_rate_limited_requests(server):
+    server.rate_limited["/profil/spieler/1"] = 2
+    content, attempts = create_scraper(server).fetch("https://www.transfermarkt.co.uk/profil/spieler/1")
+    assert content == PAGE
+    assert attempts == 3
+    assert server.requests["/profil/spieler/1"] == 3
+
+def test_gives_up_after_retries(server):
+    server.rate_limited["/profil/spieler/1"] = 10
+    with pytest.raises(ScrapeError) as error:
+        create_scraper(server).fetch("https://www.transfermarkt.co.uk/profil/spieler/1")
+    assert error.value.attempts == 3
+    assert server.requests["/profil/spieler/1"] == 3
+
+def test_does_not_retry_client_errors(server):
+    with pytest.raises(ScrapeError) as error:
+        create_scraper(server).fetch("https://www.transfermarkt.co.uk/missing")
+    assert error.value.attempts == 1
+    assert server.requests["/missing"] == 1
+
+def test_serves_fresh_pages_from_cache(server, tmp_path):
+    scraper = create_scraper(server, cache=ResponseCache(str(tmp_path)))
+    url = "https://www.transfermarkt.co.uk/profil/spieler/1"
+    assert scraper.fetch(url) == (PAGE, 1)
+    assert scraper.fetch(url) == (PAGE, 0)
+    assert server.requests["/profil/spieler/1"] == 1
+
+def test_revalidates_stale_pages(server, tmp_path):
+    scraper = create_scraper(server, cache=ResponseCache(str(tmp_path), ttl=0))
+    url = "https://www.transfermarkt.co.uk/profil/spieler/1"
+    scraper.fetch(url)
+    # The stand-in answers 304 Not Modified to the conditional request, the cached page is used
+    assert scraper.fetch(url) == (PAGE, 1)
+    assert server.requests["/profil/spieler/1"] == 2
+
+def test_scrape_reports_failures(server):
+    server.rate_limited["/profil/spieler/2"] = 1
+    urls = pd.Series({
+        1: "https://www.transfermarkt.co.uk/profil/spieler/1",
+        2: "https://www.transfermarkt.co.uk/profil/spieler/2",
+        3: "https://www.transfermarkt.co.uk/missing"
+    })
+    market_values, report = create_scraper(server).scrape(urls)
+    assert market_values.loc[1] == 45000000
+    assert market_values.loc[2] == 45000000
+    assert pd.isna(market_values.loc[3])
+    assert report.succeeded == 2
+    assert report.to_frame()["player_id"].tolist() == [3]
@@ -0,0 +1,45 @@
+"""
+    Server-side paging, sorting and filtering of TableIndex
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from table import TableIndex, filter_mask, parse_filter_query
+
+def players():
+    return pd.DataFrame({
+        "pretty_name": [f"Player {i}" for i in range(25)],
+        "age": [18 + i % 10 for i in range(25)],
+        "league_id": ["GB1"] * 20 + ["L1"] * 5
+    })
+
+def test_sorted_filtered_page():
+    index = TableIndex(players(), ["pretty_name", "age", "league_id"])
+    records, page_count, page_current = index.query(np.arange(25), 0, 5, [{"column_id": "age", "direction": "desc"}], "{age} >= 25")
+    assert (page_count, page_current) == (2, 0)
+    assert [record["age"] for record in records] == [27, 27, 26, 26, 25]
+
+def test_clamps_page_past_the_end_of_a_narrower_selection():
+    index = TableIndex(players(), ["pretty_name", "age", "league_id"])
+    # The user was on page 4 of all players when the league filter narrowed the rows to one page
+    records, page_count, page_current = index.query(np.arange(20, 25), 3, 5)
+    assert (page_count, page_current) == (1, 0)
+    assert [record["pretty_name"] for record in records] == [f"Player {i}" for i in range(20, 25)]
+
+@pytest.mark.parametrize("filter_query, expected", [
+    ("{age} >= 25", [("age", "ge", "25", True)]),
+    ("{age} s> 25", [("age", "gt", "25", True)]),
+    ("{age} i<= 25", [("age", "le", "25", False)]),
+    ("{league_id} ieq gb1", [("league_id", "eq", "gb1", False)]),
+    ("{pretty_name} scontains \"Player 1\" && {age} != 20", [("pretty_name", "contains", "Player 1", True), ("age", "ne", "20", True)]),
+    ("{age} is blank", [("age", "is blank", "", True)]),
+    ("{age} x> 25", [])
+])
+def test_parses_filter_terms(filter_query, expected):
+    assert parse_filter_query(filter_query) == expected
+
+def test_prefixed_relational_terms_filter():
+    df = players()
+    assert filter_mask(df, parse_filter_query("{age} i>= 26")).sum() == (df["age"] >= 26).sum()
+    assert filter_mask(df, parse_filter_query("{league_id} i= l1")).sum() == 5